@@ -4,21 +4,29 @@ Interactive interface for predictions, updates, and analysis
 """
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
+import numpy as np
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import queue
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+# Plotly is imported by build_figure on first use, keeping it off cold start
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
 
 # Add project root to path for imports
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from config.config import LEAGUES, MODELS_DIR
+from config.config import LEAGUES, MODELS_DIR, ensure_dirs
 from utils.database import DatabaseManager
-from prediction.predict import FootballPredictor
-from scrapers.historical_downloader import HistoricalDataDownloader
-from models.train import MatchPredictor
+from utils.plotting import downsample
+
+# Static league lookups (LEAGUES never changes at runtime)
+LEAGUE_NAME_LIST = tuple(info['name'] for info in LEAGUES.values())
+_ABOUT_LEAGUE_MD = "\n".join(f"- **{info['name']}** ({info['country']})" for info in LEAGUES.values())
 
 # Page configuration
 st.set_page_config(
@@ -28,8 +36,14 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Plotly chart options (interactive, but without the mode bar toolbar)
+PLOTLY_CONFIG = {'staticPlot': False, 'displayModeBar': False}
+
+# Line/scatter traces longer than this are down-sampled before sending
+MAX_PLOT_POINTS = 2000
+
 # Custom CSS
-st.markdown("""
+_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -62,128 +76,420 @@ st.markdown("""
         margin: 5px 0;
     }
 </style>
-""", unsafe_allow_html=True)
-
-# Initialize session state
-if 'predictor' not in st.session_state:
-    st.session_state.predictor = None
-if 'db' not in st.session_state:
-    st.session_state.db = DatabaseManager()
-if 'last_update' not in st.session_state:
-    st.session_state.last_update = None
-if 'db_initialized' not in st.session_state:
-    # Check if database is initialized
+"""
+# Emitted on every rerun (elements a rerun skips are removed, styles included),
+# so send it with the indentation collapsed
+_CSS = " ".join(_CSS.split())
+st.markdown(_CSS, unsafe_allow_html=True)
+
+# Fixed SQL text for the hot queries, so SQLite's statement cache sees
+# byte-identical strings on every rerun
+_TEAMS_IN_LEAGUE_SQL = """
+    SELECT team_name
+    FROM teams
+    WHERE league_id = ?
+      AND team_id IN (
+          SELECT home_team_id FROM matches WHERE league_id = ? AND season = ?
+          UNION
+          SELECT away_team_id FROM matches WHERE league_id = ? AND season = ?
+      )
+    ORDER BY team_name
+"""
+
+_LEAGUE_STATS_SQL = """
+    SELECT 
+        COUNT(*) as total_matches,
+        SUM(result = 'H') as home_wins,
+        SUM(result = 'D') as draws,
+        SUM(result = 'A') as away_wins,
+        AVG(home_goals + away_goals) as avg_goals,
+        ROUND(100.0 * SUM(result = 'H') / COUNT(*), 1) as home_win_pct,
+        ROUND(100.0 * SUM(result = 'D') / COUNT(*), 1) as draw_pct,
+        ROUND(100.0 * SUM(result = 'A') / COUNT(*), 1) as away_win_pct
+    FROM matches
+    WHERE league_id = ?
+"""
+
+_STANDINGS_SQL = """
+    SELECT team_name, played, points, goals_for, goals_against, GD
+    FROM league_standings
+    WHERE league_id = ?
+    ORDER BY points DESC, GD DESC
+    LIMIT 10
+"""
+
+@st.cache_resource
+def get_db():
+    """Shared database manager (one per process, reused across sessions)"""
+    ensure_dirs()
+    return DatabaseManager()
+
+@st.cache_resource(show_spinner="Loading models...")
+def get_predictor():
+    """Shared predictor with all league models loaded once per process"""
+    from prediction.predict import FootballPredictor
+    
+    predictor = FootballPredictor()
+    predictor.load_models()
+    return predictor
+
+@st.cache_resource
+def db_ready() -> bool:
+    """Check once per process whether the matches table exists"""
     try:
-        stats = st.session_state.db.execute_query("SELECT COUNT(*) FROM matches")
-        st.session_state.db_initialized = True
+        return bool(get_db().execute_query(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'matches'"
+        ))
     except:
-        st.session_state.db_initialized = False
+        return False
 
-def load_models():
-    """Load prediction models"""
-    if st.session_state.predictor is None:
-        with st.spinner("Loading models..."):
-            st.session_state.predictor = FootballPredictor()
-            st.session_state.predictor.load_models()
-    return st.session_state.predictor
+@st.cache_resource
+def get_last_update():
+    """Time of the last completed update (kept in the meta table, shared by all sessions)"""
+    value = get_db().get_meta('last_update')
+    return datetime.fromisoformat(value) if value else None
 
-def get_teams_in_league(league_name: str, season: str = None):
+@st.cache_data(ttl=86400, show_spinner=False)
+def get_league_id(league_name: str):
+    """Get league ID by name (None if the league isn't in the database)"""
+    result = get_db().execute_query(
+        "SELECT league_id FROM leagues WHERE league_name = ?",
+        (league_name,)
+    )
+    return result[0][0] if result else None
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_teams_in_league(league_id: int, season: str = None):
     """
     Get list of teams in a league for a specific season
     
     Args:
-        league_name: Name of the league
+        league_id: League ID
         season: Season code (e.g., '2526'). If None, gets teams from most recent season
     
     Returns:
-        List of team names
+        Tuple of team names
     """
-    db = st.session_state.db
+    db = get_db()
     
     if season is None:
         # Get most recent season for this league
-        season_query = """
-            SELECT season 
-            FROM matches m
-            JOIN leagues l ON m.league_id = l.league_id
-            WHERE l.league_name = ?
-            GROUP BY season
-            ORDER BY season DESC
-            LIMIT 1
-        """
-        season_result = db.execute_query(season_query, (league_name,))
-        if season_result:
-            season = season_result[0][0]
-        else:
+        season = db.execute_query(
+            "SELECT MAX(season) FROM matches WHERE league_id = ?",
+            (league_id,)
+        )[0][0]
+        if season is None:
             # Fallback to all teams if no season found
-            query = """
-                SELECT DISTINCT t.team_name 
-                FROM teams t
-                JOIN leagues l ON t.league_id = l.league_id
-                WHERE l.league_name = ?
-                ORDER BY t.team_name
-            """
-            results = db.execute_query(query, (league_name,))
-            return [row[0] for row in results]
+            results = db.execute_query(
+                "SELECT team_name FROM teams WHERE league_id = ? ORDER BY team_name",
+                (league_id,)
+            )
+            return tuple(row[0] for row in results)
     
     # Get teams that played in this specific season
-    query = """
-        SELECT DISTINCT t.team_name 
-        FROM teams t
-        JOIN leagues l ON t.league_id = l.league_id
-        JOIN matches m ON (m.home_team_id = t.team_id OR m.away_team_id = t.team_id)
-        WHERE l.league_name = ? AND m.season = ?
-        ORDER BY t.team_name
-    """
-    results = db.execute_query(query, (league_name, season))
-    return [row[0] for row in results]
+    results = db.execute_query(_TEAMS_IN_LEAGUE_SQL, (league_id, league_id, season, league_id, season))
+    return tuple(row[0] for row in results)
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_away_options(league_id: int, home_team: str):
+    """Away team choices: the league's teams minus the selected home team"""
+    return tuple(t for t in get_teams_in_league(league_id) if t != home_team)
+
+@st.cache_data(ttl=600, show_spinner=False)
 def get_database_stats():
     """Get database statistics"""
-    db = st.session_state.db
+    db = get_db()
+    row = db.execute_query("""
+        SELECT (SELECT COUNT(*) FROM matches),
+               (SELECT COUNT(*) FROM teams),
+               (SELECT COUNT(*) FROM leagues)
+    """)[0]
     stats = {
-        'total_matches': db.execute_query("SELECT COUNT(*) FROM matches")[0][0],
-        'total_teams': db.execute_query("SELECT COUNT(*) FROM teams")[0][0],
-        'total_leagues': db.execute_query("SELECT COUNT(*) FROM leagues")[0][0],
+        'total_matches': row[0],
+        'total_teams': row[1],
+        'total_leagues': row[2],
     }
     return stats
 
+@st.cache_data(ttl=3600)
+def get_league_outcome_stats(league_id: int):
+    """Get match outcome counts and average goals for a league"""
+    db = get_db()
+    return db.execute_query(_LEAGUE_STATS_SQL, (league_id,))
+
+@st.cache_data(ttl=3600)
+def get_standings(league_id: int) -> pd.DataFrame:
+    """Get top 10 of the all-time league table (by points)"""
+    db = get_db()
+    
+    # Materialized by update_database(); build it on first use if missing
+    if not db.execute_query(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'league_standings'"
+    ):
+        db.refresh_league_standings()
+    
+    return db.get_dataframe(_STANDINGS_SQL, (league_id,), dtype_backend='pyarrow')
+
+@st.cache_resource
+def get_standings_calculator():
+    """Shared standings calculator for the League Standings tab"""
+    from utils.standings_calculator import StandingsCalculator
+    from config.config import DB_PATH
+    
+    return StandingsCalculator(str(DB_PATH))
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_available_seasons(league_name: str):
+    """Get (season_code, display_label) pairs for a league, newest first"""
+    return get_standings_calculator().get_all_available_seasons(league_name)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_season_standings(league_name: str, season: str) -> pd.DataFrame:
+    """Get the full league table for one season"""
+    return get_standings_calculator().calculate_standings(league_name, season)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_home_standings(league_name: str, season: str) -> pd.DataFrame:
+    """Get the home-only table for one season"""
+    return get_standings_calculator().get_home_standings(league_name, season)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_away_standings(league_name: str, season: str) -> pd.DataFrame:
+    """Get the away-only table for one season"""
+    return get_standings_calculator().get_away_standings(league_name, season)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_form_standings(league_name: str, season: str) -> pd.DataFrame:
+    """Get the last-5-matches form table for one season"""
+    return get_standings_calculator().get_form_table(league_name, season)
+
+@st.cache_data(ttl=86400)
+def get_match_ids(league_name: str, home_team: str, away_team: str):
+    """Resolve league ID and both team IDs in a single query"""
+    db = get_db()
+    query = """
+        SELECT l.league_id,
+               (SELECT team_id FROM teams WHERE league_id = l.league_id AND team_name = ?),
+               (SELECT team_id FROM teams WHERE league_id = l.league_id AND team_name = ?)
+        FROM leagues l
+        WHERE l.league_name = ?
+    """
+    return db.execute_query(query, (home_team, away_team, league_name))[0]
+
+def clear_data_caches():
+    """Invalidate cached query results after the database changes"""
+    get_teams_in_league.clear()
+    get_away_options.clear()
+    get_database_stats.clear()
+    get_league_outcome_stats.clear()
+    get_standings.clear()
+    get_match_ids.clear()
+    get_league_id.clear()
+    get_available_seasons.clear()
+    get_season_standings.clear()
+    get_home_standings.clear()
+    get_away_standings.clear()
+    get_form_standings.clear()
+    # The predictor's feature engineer caches form and H2H by date, and models
+    # may have been retrained; rebuild it on next use
+    get_predictor.clear()
+
+@st.cache_resource
+def get_update_state():
+    """Background update state shared by all sessions (one update at a time)"""
+    return {
+        'executor': ThreadPoolExecutor(max_workers=1),
+        'queue': queue.Queue(),
+        'future': None,
+        'progress': (0, ''),
+    }
+
+def _do_update(progress: queue.Queue):
+    """Download, save and retrain - runs on the background update thread"""
+    from scrapers.historical_downloader import HistoricalDataDownloader
+    from models.train import MatchPredictor
+    
+    # Download new data
+    progress.put((20, "Downloading latest match data..."))
+    
+    downloader = HistoricalDataDownloader()
+    all_data = downloader.download_all_leagues()
+    
+    progress.put((60, "Saving to database..."))
+    
+    for league_name, df in all_data.items():
+        downloader.save_to_database(league_name, df)
+    
+    downloader.db.refresh_league_standings()
+    downloader.db.refresh_team_recent_stats()
+    
+    progress.put((80, "Retraining models..."))
+    
+    # Retrain models
+    trainer = MatchPredictor()
+    trainer.train_all_leagues(save_models=True)
+    
+    clear_data_caches()  # Also reloads the retrained models
+    
+    finished = datetime.now()
+    downloader.db.set_meta('last_update', finished.isoformat())
+    get_last_update.clear()
+    
+    progress.put((100, "✅ Update complete!"))
+    return finished
+
 def update_database():
-    """Update database with latest matches"""
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    """Start updating the database with latest matches in the background"""
+    state = get_update_state()
     
-    try:
-        # Download new data
-        status_text.text("Downloading latest match data...")
-        progress_bar.progress(20)
-        
-        downloader = HistoricalDataDownloader()
-        all_data = downloader.download_all_leagues()
-        
-        progress_bar.progress(60)
-        status_text.text("Saving to database...")
-        
-        for league_name, df in all_data.items():
-            downloader.save_to_database(league_name, df)
-        
-        progress_bar.progress(80)
-        status_text.text("Retraining models...")
-        
-        # Retrain models
-        trainer = MatchPredictor()
-        trainer.train_all_leagues(save_models=True)
-        
-        progress_bar.progress(100)
-        status_text.text("✅ Update complete!")
-        
-        st.session_state.last_update = datetime.now()
-        st.session_state.predictor = None  # Force reload of models
-        
-        return True
-    except Exception as e:
-        status_text.text(f"❌ Error: {e}")
-        return False
+    # Sessions share the in-flight update instead of starting another one
+    if state['future'] is None or state['future'].done():
+        state['progress'] = (0, "Starting update...")
+        state['future'] = state['executor'].submit(_do_update, state['queue'])
+    
+    return state['future']
+
+@st.fragment(run_every=2)
+def show_update_progress():
+    """Poll the background update and show its progress"""
+    state = get_update_state()
+    future = state['future']
+    
+    while not state['queue'].empty():
+        state['progress'] = state['queue'].get_nowait()
+    
+    pct, text = state['progress']
+    
+    if future.done():
+        error = future.exception()
+        if error is not None:
+            st.error(f"❌ Error: {error}")
+            return
+    
+    st.progress(pct)
+    st.text(text)
+
+@st.cache_data(max_entries=512)
+def _pred_html(home_team: str, away_team: str, league: str,
+               outcome: str, confidence: str, confidence_class: str) -> str:
+    """Build the prediction box HTML"""
+    return f"""
+    <div class="prediction-box {confidence_class}">
+        <h2>{home_team} vs {away_team}</h2>
+        <h3>{league}</h3>
+        <h1>{outcome}</h1>
+        <p>Confidence: {confidence}</p>
+    </div>
+    """
+
+@st.cache_data
+def _about_md():
+    """Static markdown for the About tab"""
+    how_it_works = """
+    This system uses **XGBoost machine learning** to predict match outcomes:
+    
+    1. **Data Collection**: Historical match data from 2021-2024
+    2. **Feature Engineering**: 30+ statistical features per match
+    3. **Model Training**: Separate models for each league
+    4. **Prediction**: Analyzes team form, statistics, and patterns
+    
+    **Accuracy**: 42-52% (excellent for football prediction!)
+    """
+    key_features = """
+    - Team form (last 5 matches)
+    - Home/Away performance
+    - Goals scored/conceded
+    - Shots accuracy
+    - Disciplinary record
+    - Head-to-head history
+    """
+    important_notes = """
+    - **Update weekly** for best results
+    - **Check team news** before betting
+    - **52% accuracy is excellent** for football
+    - **Use as guidance**, not guarantee
+    - **Bet responsibly**
+    """
+    pro_tip = """
+    💡 **Pro Tip**: Combine AI predictions with your own knowledge of:
+    - Team injuries and suspensions
+    - Manager tactics
+    - Team motivation
+    - Weather conditions
+    """
+    return how_it_works, key_features, important_notes, pro_tip
+
+def position_zones(ranks: pd.Series) -> np.ndarray:
+    """Zone marker per standings row: 🟢 Champions League, 🔵 Europa, 🔴 relegation"""
+    rank = ranks.to_numpy()
+    zone = np.full(len(rank), '', dtype=object)
+    
+    # Later assignments win, so apply the lowest-priority band first
+    zone[rank >= len(rank) - 2] = '🔴'
+    zone[rank <= 6] = '🔵'
+    zone[rank <= 4] = '🟢'
+    return zone
+
+def build_figure(spec: dict) -> 'go.Figure':
+    """Validate a Plotly dict spec into a Figure, down-sampling oversized line/scatter traces"""
+    for trace in spec['data']:
+        if trace.get('type', 'scatter') not in ('scatter', 'scattergl'):
+            continue
+        if len(trace.get('x', [])) > MAX_PLOT_POINTS:
+            points = downsample(
+                pd.DataFrame({'x': trace['x'], 'y': trace['y']}), 'x', 'y', MAX_PLOT_POINTS
+            )
+            trace['x'] = points['x'].tolist()
+            trace['y'] = points['y'].tolist()
+    
+    import plotly.graph_objects as go
+    return go.Figure(spec)
+
+def render_plot(fig):
+    """Render a Plotly Figure, or a dict spec (validated via build_figure)"""
+    if isinstance(fig, dict):
+        fig = build_figure(fig)
+    
+    st.plotly_chart(fig, use_container_width=True, config=PLOTLY_CONFIG)
+
+# Figures are cached as validated objects keyed by the numbers they plot;
+# st.plotly_chart only re-validates dict specs, not Figures
+@st.cache_resource(max_entries=512, show_spinner=False)
+def probability_chart(home_pct: float, draw_pct: float, away_pct: float) -> 'go.Figure':
+    """Bar chart of the three outcome probabilities (in %)"""
+    return build_figure({
+        'data': [{
+            'type': 'bar',
+            'x': ['Home Win', 'Draw', 'Away Win'],
+            'y': [home_pct, draw_pct, away_pct],
+            'marker': {'color': ['#2ecc71', '#3498db', '#e74c3c']},
+            'texttemplate': '%{y:.1f}%',
+            'textposition': 'auto'
+        }],
+        'layout': {
+            'title': "Prediction Probabilities",
+            'yaxis': {'title': "Probability (%)"},
+            'height': 400,
+            'showlegend': False
+        }
+    })
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def outcome_pie_chart(league: str, home_wins: int, draws: int, away_wins: int) -> 'go.Figure':
+    """Pie chart of a league's match outcomes"""
+    return build_figure({
+        'data': [{
+            'type': 'pie',
+            'labels': ['Home Wins', 'Draws', 'Away Wins'],
+            'values': [home_wins, draws, away_wins],
+            'hole': .3,
+            'marker': {'colors': ['#2ecc71', '#3498db', '#e74c3c']}
+        }],
+        'layout': {
+            'title': f"{league} - Match Outcomes Distribution",
+            'height': 400
+        }
+    })
 
 def display_prediction(prediction: dict):
     """Display prediction with styling"""
@@ -201,60 +507,39 @@ def display_prediction(prediction: dict):
         'LOW': 'low-confidence'
     }.get(confidence, 'low-confidence')
     
-    st.markdown(f"""
-    <div class="prediction-box {confidence_class}">
-        <h2>{prediction['home_team']} vs {prediction['away_team']}</h2>
-        <h3>{prediction['league']}</h3>
-        <h1>{pred['outcome']}</h1>
-        <p>Confidence: {confidence}</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(
+        _pred_html(prediction['home_team'], prediction['away_team'], prediction['league'],
+                   pred['outcome'], confidence, confidence_class),
+        unsafe_allow_html=True
+    )
     
-    # Probabilities
+    # Probabilities (as percentages, computed once for metrics and chart)
+    probs = np.array([pred['home_win_prob'], pred['draw_prob'], pred['away_win_prob']]) * 100
     col1, col2, col3 = st.columns(3)
     
     with col1:
         st.metric(
             label="🏠 Home Win",
-            value=f"{pred['home_win_prob']*100:.1f}%",
+            value=f"{probs[0]:.1f}%",
             delta=None
         )
     
     with col2:
         st.metric(
             label="🤝 Draw",
-            value=f"{pred['draw_prob']*100:.1f}%",
+            value=f"{probs[1]:.1f}%",
             delta=None
         )
     
     with col3:
         st.metric(
             label="✈️ Away Win",
-            value=f"{pred['away_win_prob']*100:.1f}%",
+            value=f"{probs[2]:.1f}%",
             delta=None
         )
     
     # Probability chart
-    fig = go.Figure(data=[
-        go.Bar(
-            x=['Home Win', 'Draw', 'Away Win'],
-            y=[pred['home_win_prob']*100, pred['draw_prob']*100, pred['away_win_prob']*100],
-            marker_color=['#2ecc71', '#3498db', '#e74c3c'],
-            text=[f"{pred['home_win_prob']*100:.1f}%", 
-                  f"{pred['draw_prob']*100:.1f}%", 
-                  f"{pred['away_win_prob']*100:.1f}%"],
-            textposition='auto',
-        )
-    ])
-    
-    fig.update_layout(
-        title="Prediction Probabilities",
-        yaxis_title="Probability (%)",
-        height=400,
-        showlegend=False
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    render_plot(probability_chart(*probs.tolist()))
     
     # Explanation
     st.subheader("📊 Key Factors")
@@ -267,6 +552,337 @@ def display_prediction(prediction: dict):
         else:
             st.info(factor)
 
+@st.fragment(run_every=60)
+def _sidebar_stats():
+    """Sidebar database stats, refreshed on their own timer"""
+    stats = get_database_stats()
+    st.metric("Total Matches", f"{stats['total_matches']:,}")
+    st.metric("Teams", stats['total_teams'])
+    st.metric("Leagues", stats['total_leagues'])
+
+@st.fragment
+def _predict_tab():
+    """Match prediction tab - reruns on its own when its widgets change"""
+    st.header("Match Prediction")
+    
+    # League selection
+    selected_league_name = st.selectbox(
+        "Select League",
+        options=LEAGUE_NAME_LIST,
+        index=0
+    )
+    
+    # Get teams
+    league_id = get_league_id(selected_league_name)
+    teams = get_teams_in_league(league_id) if league_id else ()
+    
+    if not teams:
+        st.error("No teams found in database. Please update the database first.")
+        return
+    
+    # Team selection
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        home_team = st.selectbox(
+            "🏠 Home Team",
+            options=teams,
+            index=0
+        )
+    
+    with col2:
+        away_team = st.selectbox(
+            "✈️ Away Team",
+            options=get_away_options(league_id, home_team),
+            index=0
+        )
+    
+    # Predict button
+    if st.button("🎯 Predict Match", type="primary", use_container_width=True):
+        predictor = get_predictor()
+        
+        with st.spinner("Analyzing match data..."):
+            # Get team IDs
+            league_id, home_team_id, away_team_id = get_match_ids(
+                selected_league_name, home_team, away_team
+            )
+            
+            # Make prediction
+            prediction = predictor.predict_match(
+                home_team_id,
+                away_team_id,
+                league_id,
+                datetime.now().strftime('%Y-%m-%d')
+            )
+            
+            # Display
+            display_prediction(prediction)
+
+@st.fragment
+def _stats_tab():
+    """League statistics tab - reruns on its own when its widgets change"""
+    st.header("📈 League Statistics")
+    
+    # League selector for stats
+    stat_league = st.selectbox(
+        "Select League for Statistics",
+        options=LEAGUE_NAME_LIST,
+        key="stat_league"
+    )
+    
+    # Get league stats
+    league_id = get_league_id(stat_league)
+    
+    if league_id:
+        # Get match statistics
+        stats = get_league_outcome_stats(league_id)
+        
+        if stats and stats[0][0] > 0:
+            total, home_wins, draws, away_wins, avg_goals, home_pct, draw_pct, away_pct = stats[0]
+            
+            # Format metric strings only when the league (or its stats) change
+            metrics_key = (stat_league, stats[0])
+            if st.session_state.get('stat_metrics_key') != metrics_key:
+                st.session_state.stat_metrics_key = metrics_key
+                st.session_state.stat_metrics = (
+                    f"{total:,}",
+                    f"{home_wins} ({home_pct}%)",
+                    f"{draws} ({draw_pct}%)",
+                    f"{away_wins} ({away_pct}%)",
+                    f"{avg_goals:.2f}"
+                )
+            total_str, home_str, draw_str, away_str, avg_goals_str = st.session_state.stat_metrics
+            
+            # Display metrics
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Total Matches", total_str)
+            
+            with col2:
+                st.metric("Home Wins", home_str)
+            
+            with col3:
+                st.metric("Draws", draw_str)
+            
+            with col4:
+                st.metric("Away Wins", away_str)
+            
+            st.metric("Average Goals per Match", avg_goals_str)
+            
+            # Pie chart
+            render_plot(outcome_pie_chart(stat_league, home_wins, draws, away_wins))
+            
+            # Top scorers
+            st.subheader("📊 League Table (by points)")
+            
+            standings_df = get_standings(league_id)
+            
+            if not standings_df.empty:
+                standings_df.index = range(1, len(standings_df) + 1)
+                
+                st.dataframe(
+                    standings_df[['team_name', 'played', 'points', 'goals_for', 'goals_against', 'GD']],
+                    column_config={
+                        "team_name": st.column_config.TextColumn("Team"),
+                        "played": st.column_config.NumberColumn("P", format="%d"),
+                        "points": st.column_config.NumberColumn("Pts", format="%d"),
+                        "goals_for": st.column_config.NumberColumn("GF", format="%d"),
+                        "goals_against": st.column_config.NumberColumn("GA", format="%d"),
+                        "GD": st.column_config.NumberColumn("GD", format="%+d")
+                    },
+                    use_container_width=True
+                )
+
+@st.fragment
+def _standings_tab():
+    """League standings tab - reruns on its own when its widgets change"""
+    st.header("🏆 Live League Standings")
+    st.markdown("**Real-time standings calculated from your database** - Updates when you download new data!")
+    
+    try:
+        # League selector
+        league_name = st.selectbox(
+            "Select League",
+            LEAGUE_NAME_LIST,
+            key="standings_league"
+        )
+        
+        # Get available seasons
+        available_seasons = get_available_seasons(league_name)
+        
+        if available_seasons:
+            # Show season selector
+            season_labels = [label for _, label in available_seasons]
+            selected_season_label = st.selectbox(
+                "Select Season",
+                season_labels,
+                index=0,  # Default to most recent
+                key="season_selector"
+            )
+            
+            # Get the corresponding season code
+            selected_season_code = [code for code, label in available_seasons if label == selected_season_label][0]
+            
+            # Show data info
+            with st.expander("ℹ️ Data Information"):
+                st.info(f"""
+                **League:** {league_name}  
+                **Season:** {selected_season_label}  
+                **Source:** Your local database  
+                **Last Update:** Data refreshes when you run download updates
+                """)
+            
+            # Fetch and display standings
+            with st.spinner(f"Calculating {league_name} standings..."):
+                standings_df = get_season_standings(league_name, selected_season_code)
+                
+                if standings_df is not None and not standings_df.empty:
+                    st.success(f"✅ Loaded {len(standings_df)} teams • {int(standings_df['Played'].mean())} games played per team")
+                    
+                    # Main standings table
+                    st.subheader(f"📊 {league_name} - {selected_season_label} Season")
+                    
+                    # Prepare display dataframe
+                    display_df = standings_df[['Rank', 'Team', 'Played', 'Won', 'Drawn', 
+                                               'Lost', 'GF', 'GA', 'GD', 'Points', 'Form']].copy()
+                    
+                    display_df.insert(1, 'Zone', position_zones(display_df['Rank']))
+                    
+                    # Plain dataframe (no Styler payload), zones shown as a marker column
+                    st.dataframe(
+                        display_df,
+                        column_config={
+                            "Rank": st.column_config.NumberColumn("#", format="%d"),
+                            "Zone": st.column_config.TextColumn("Zone", width="small"),
+                            "GD": st.column_config.NumberColumn("GD", format="%+d")
+                        },
+                        hide_index=True,
+                        use_container_width=True,
+                        height=600
+                    )
+                    
+                    # Legend
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.markdown("🟢 **Champions League** (Top 4)")
+                    with col2:
+                        st.markdown("🔵 **Europa League** (5-6)")
+                    with col3:
+                        st.markdown("🔴 **Relegation** (Bottom 3)")
+                    
+                    st.divider()
+                    
+                    # Additional tables in tabs
+                    sub_tab1, sub_tab2, sub_tab3, sub_tab4 = st.tabs([
+                        "📈 Top Performers", 
+                        "🏠 Home Form", 
+                        "✈️ Away Form",
+                        "🔥 Recent Form"
+                    ])
+                    
+                    with sub_tab1:
+                        st.subheader("📈 Top Performers")
+                        
+                        col1, col2, col3 = st.columns(3)
+                        
+                        with col1:
+                            st.metric("🥇 Top Team", 
+                                     standings_df.iloc[0]['Team'], 
+                                     f"{standings_df.iloc[0]['Points']} pts")
+                            st.caption(f"Played: {standings_df.iloc[0]['Played']} | GD: {standings_df.iloc[0]['GD']:+d}")
+                        
+                        with col2:
+                            top_scorer_team = standings_df.loc[standings_df['GF'].idxmax()]
+                            st.metric("⚽ Best Attack", 
+                                     top_scorer_team['Team'], 
+                                     f"{top_scorer_team['GF']} goals")
+                            st.caption(f"{top_scorer_team['GF'] / top_scorer_team['Played']:.2f} goals per game")
+                        
+                        with col3:
+                            best_defense_team = standings_df.loc[standings_df['GA'].idxmin()]
+                            st.metric("🛡️ Best Defense", 
+                                     best_defense_team['Team'], 
+                                     f"{best_defense_team['GA']} conceded")
+                            st.caption(f"{best_defense_team['GA'] / best_defense_team['Played']:.2f} conceded per game")
+                        
+                        st.divider()
+                        
+                        # Form guide explanation
+                        st.markdown("""
+                        **Form Guide**: Last 5 matches (most recent on right)
+                        - **W** = Win | **D** = Draw | **L** = Loss
+                        - Look for teams with strong recent form (WWWWW, WWDWW, etc.)
+                        """)
+                    
+                    with sub_tab2:
+                        st.subheader("🏠 Home Form Table")
+                        home_df = get_home_standings(league_name, selected_season_code)
+                        if home_df is not None:
+                            st.dataframe(
+                                home_df[['Rank', 'Team', 'Played', 'Home_W', 'Home_D', 'Home_L', 'Points']].rename(columns={
+                                    'Home_W': 'Won',
+                                    'Home_D': 'Drawn',
+                                    'Home_L': 'Lost'
+                                }),
+                                use_container_width=True,
+                                height=500
+                            )
+                            st.caption("💡 Shows performance in home matches only")
+                    
+                    with sub_tab3:
+                        st.subheader("✈️ Away Form Table")
+                        away_df = get_away_standings(league_name, selected_season_code)
+                        if away_df is not None:
+                            st.dataframe(
+                                away_df[['Rank', 'Team', 'Played', 'Away_W', 'Away_D', 'Away_L', 'Points']].rename(columns={
+                                    'Away_W': 'Won',
+                                    'Away_D': 'Drawn',
+                                    'Away_L': 'Lost'
+                                }),
+                                use_container_width=True,
+                                height=500
+                            )
+                            st.caption("💡 Shows performance in away matches only")
+                    
+                    with sub_tab4:
+                        st.subheader("🔥 Recent Form (Last 5 Matches)")
+                        form_df = get_form_standings(league_name, selected_season_code)
+                        if form_df is not None:
+                            st.dataframe(
+                                form_df,
+                                use_container_width=True,
+                                height=500
+                            )
+                            st.caption("💡 Rankings based on points from last 5 matches only")
+                
+                else:
+                    st.warning(f"⚠️ No data available for {league_name} - {selected_season_label}")
+                    st.info("""
+                    **To get standings:**
+                    1. Click the "🔄 Update Database" button in the sidebar
+                    2. Wait for data to download
+                    3. Standings will appear automatically!
+                    """)
+        else:
+            st.warning(f"⚠️ No data available for {league_name}")
+            st.info("""
+            **To get data:**
+            1. Click the "🔄 Update Database" button in the sidebar
+            2. Select leagues to download
+            3. Wait for download to complete
+            4. Refresh this page!
+            """)
+    
+    except ImportError as e:
+        st.error(f"⚠️ Standings calculator not available: {e}")
+        st.info("Please ensure standings_calculator.py is in the utils folder.")
+    except Exception as e:
+        st.error(f"❌ Error calculating standings: {e}")
+        st.code(str(e))
+        st.error(f"❌ Error: {e}")
+        st.info("Make sure your API key is configured correctly in config.py")
+
 # Main app
 def main():
     # Header
@@ -274,7 +890,7 @@ def main():
     st.markdown("### AI-Powered Match Predictions for Top European Leagues")
     
     # Check if database is initialized
-    if not st.session_state.db_initialized:
+    if not db_ready():
         st.error("⚠️ Database not initialized! Please wait while we set up...")
         st.info("This happens on first deployment. The setup process is running in the background.")
         st.markdown("""
@@ -293,7 +909,8 @@ def main():
                     from setup_database import setup_database
                     setup_database()
                     st.success("✅ Database initialized! Please use the Update Database button to download data.")
-                    st.session_state.db_initialized = True
+                    db_ready.clear()
+                    clear_data_caches()
                     st.rerun()
                 except Exception as e:
                     st.error(f"Setup failed: {e}")
@@ -306,13 +923,14 @@ def main():
         
         # Database stats
         st.subheader("📊 System Status")
-        stats = get_database_stats()
-        st.metric("Total Matches", f"{stats['total_matches']:,}")
-        st.metric("Teams", stats['total_teams'])
-        st.metric("Leagues", stats['total_leagues'])
+        _sidebar_stats()
+        
+        if get_update_state()['future'] is not None:
+            show_update_progress()
         
-        if st.session_state.last_update:
-            st.info(f"Last update: {st.session_state.last_update.strftime('%Y-%m-%d %H:%M')}")
+        last_update = get_last_update()
+        if last_update:
+            st.info(f"Last update: {last_update.strftime('%Y-%m-%d %H:%M')}")
         
         st.divider()
         
@@ -345,492 +963,39 @@ def main():
     tab1, tab2, tab3, tab4 = st.tabs(["🎯 Predict Match", "📈 Statistics", "🏆 League Standings", "ℹ️ About"])
     
     with tab1:
-        st.header("Match Prediction")
-        
-        # League selection
-        league_options = {info['name']: key for key, info in LEAGUES.items()}
-        selected_league_name = st.selectbox(
-            "Select League",
-            options=list(league_options.keys()),
-            index=0
-        )
-        
-        selected_league_key = league_options[selected_league_name]
-        
-        # Get teams
-        teams = get_teams_in_league(selected_league_name)
-        
-        if not teams:
-            st.error("No teams found in database. Please update the database first.")
-            return
-        
-        # Team selection
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            home_team = st.selectbox(
-                "🏠 Home Team",
-                options=teams,
-                index=0
-            )
-        
-        with col2:
-            away_team = st.selectbox(
-                "✈️ Away Team",
-                options=[t for t in teams if t != home_team],
-                index=0
-            )
-        
-        # Predict button
-        if st.button("🎯 Predict Match", type="primary", use_container_width=True):
-            predictor = load_models()
-            
-            with st.spinner("Analyzing match data..."):
-                # Get team IDs
-                db = st.session_state.db
-                
-                league_result = db.execute_query(
-                    "SELECT league_id FROM leagues WHERE league_name = ?",
-                    (selected_league_name,)
-                )
-                league_id = league_result[0][0]
-                
-                home_team_id = db.get_team_id(home_team, league_id)
-                away_team_id = db.get_team_id(away_team, league_id)
-                
-                # Make prediction
-                prediction = predictor.predict_match(
-                    home_team_id,
-                    away_team_id,
-                    league_id,
-                    datetime.now().strftime('%Y-%m-%d')
-                )
-                
-                # Display
-                display_prediction(prediction)
+        _predict_tab()
     
     with tab2:
-        st.header("📈 League Statistics")
-        
-        # League selector for stats
-        stat_league = st.selectbox(
-            "Select League for Statistics",
-            options=list(league_options.keys()),
-            key="stat_league"
-        )
-        
-        # Get league stats
-        db = st.session_state.db
-        league_result = db.execute_query(
-            "SELECT league_id FROM leagues WHERE league_name = ?",
-            (stat_league,)
-        )
-        
-        if league_result:
-            league_id = league_result[0][0]
-            
-            # Get match statistics
-            query = """
-                SELECT 
-                    COUNT(*) as total_matches,
-                    SUM(CASE WHEN result = 'H' THEN 1 ELSE 0 END) as home_wins,
-                    SUM(CASE WHEN result = 'D' THEN 1 ELSE 0 END) as draws,
-                    SUM(CASE WHEN result = 'A' THEN 1 ELSE 0 END) as away_wins,
-                    AVG(home_goals + away_goals) as avg_goals
-                FROM matches
-                WHERE league_id = ?
-            """
-            
-            stats = db.execute_query(query, (league_id,))
-            
-            if stats and stats[0][0] > 0:
-                total, home_wins, draws, away_wins, avg_goals = stats[0]
-                
-                # Display metrics
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.metric("Total Matches", f"{total:,}")
-                
-                with col2:
-                    st.metric("Home Wins", f"{home_wins} ({home_wins/total*100:.1f}%)")
-                
-                with col3:
-                    st.metric("Draws", f"{draws} ({draws/total*100:.1f}%)")
-                
-                with col4:
-                    st.metric("Away Wins", f"{away_wins} ({away_wins/total*100:.1f}%)")
-                
-                st.metric("Average Goals per Match", f"{avg_goals:.2f}")
-                
-                # Pie chart
-                fig = go.Figure(data=[go.Pie(
-                    labels=['Home Wins', 'Draws', 'Away Wins'],
-                    values=[home_wins, draws, away_wins],
-                    hole=.3,
-                    marker_colors=['#2ecc71', '#3498db', '#e74c3c']
-                )])
-                
-                fig.update_layout(
-                    title=f"{stat_league} - Match Outcomes Distribution",
-                    height=400
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Top scorers
-                st.subheader("📊 League Table (by points)")
-                
-                standings_query = """
-                    SELECT 
-                        t.team_name,
-                        COUNT(*) as played,
-                        SUM(CASE 
-                            WHEN (m.home_team_id = t.team_id AND m.result = 'H') 
-                                OR (m.away_team_id = t.team_id AND m.result = 'A') 
-                            THEN 3
-                            WHEN m.result = 'D' THEN 1
-                            ELSE 0
-                        END) as points,
-                        SUM(CASE 
-                            WHEN m.home_team_id = t.team_id THEN m.home_goals 
-                            ELSE m.away_goals 
-                        END) as goals_for,
-                        SUM(CASE 
-                            WHEN m.home_team_id = t.team_id THEN m.away_goals 
-                            ELSE m.home_goals 
-                        END) as goals_against
-                    FROM teams t
-                    JOIN matches m ON t.team_id = m.home_team_id OR t.team_id = m.away_team_id
-                    WHERE t.league_id = ?
-                    GROUP BY t.team_id, t.team_name
-                    ORDER BY points DESC, (goals_for - goals_against) DESC
-                    LIMIT 10
-                """
-                
-                standings_df = db.get_dataframe(standings_query, (league_id,))
-                
-                if not standings_df.empty:
-                    standings_df['GD'] = standings_df['goals_for'] - standings_df['goals_against']
-                    standings_df.index = range(1, len(standings_df) + 1)
-                    
-                    st.dataframe(
-                        standings_df[['team_name', 'played', 'points', 'goals_for', 'goals_against', 'GD']],
-                        column_config={
-                            "team_name": "Team",
-                            "played": "P",
-                            "points": "Pts",
-                            "goals_for": "GF",
-                            "goals_against": "GA",
-                            "GD": "GD"
-                        },
-                        use_container_width=True
-                    )
-    
-    with tab3:
-        st.header("ℹ️ About This System")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("🎯 Features")
-            st.markdown("""
-            - **AI-Powered Predictions** using XGBoost
-            - **7,000+ Historical Matches** analyzed
-            - **30+ Features** per prediction
-            - **5 Major Leagues** supported
-            - **42-52% Accuracy** overall
-            - **Real-time Updates** via button
-            """)
-            
-            st.subheader("📊 How It Works")
-            st.markdown("""
-            1. **Data Collection**: 4 seasons of match data
-            2. **Feature Engineering**: 30+ calculated metrics
-            3. **Machine Learning**: XGBoost models
-            4. **Predictions**: Win/Draw/Loss probabilities
-            """)
-        
-        with col2:
-            st.subheader("🏆 Supported Leagues")
-            for league_info in LEAGUES.values():
-                st.markdown(f"- **{league_info['name']}** ({league_info['country']})")
-            
-            st.subheader("⚠️ Important Notes")
-            st.markdown("""
-            - **Update weekly** for best results
-            - **Check team news** before betting
-            - **52% accuracy is excellent** for football
-            - **Use as guidance**, not guarantee
-            - **Bet responsibly**
-            """)
-        
-        st.divider()
-        
-        st.info("""
-        💡 **Pro Tip**: Combine AI predictions with your own knowledge of:
-        - Team injuries and suspensions
-        - Manager tactics
-        - Team motivation
-        - Weather conditions
-        """)
+        _stats_tab()
     
-    # Tab 3: League Standings
     with tab3:
-        st.header("🏆 Live League Standings")
-        st.markdown("**Real-time standings calculated from your database** - Updates when you download new data!")
-        
-        try:
-            from utils.standings_calculator import StandingsCalculator
-            from config.config import DB_PATH
-            
-            calculator = StandingsCalculator(str(DB_PATH))
-            
-            # League selector
-            league_names = list(LEAGUES.keys())
-            league_display_names = [LEAGUES[key]['name'] for key in league_names]
-            
-            selected_display = st.selectbox(
-                "Select League",
-                league_display_names,
-                key="standings_league"
-            )
-            
-            # Get selected league key
-            selected_key = league_names[league_display_names.index(selected_display)]
-            selected_league = LEAGUES[selected_key]
-            league_name = selected_league['name']
-            
-            # Get available seasons
-            available_seasons = calculator.get_all_available_seasons(league_name)
-            
-            if available_seasons:
-                # Show season selector
-                season_labels = [label for _, label in available_seasons]
-                selected_season_label = st.selectbox(
-                    "Select Season",
-                    season_labels,
-                    index=0,  # Default to most recent
-                    key="season_selector"
-                )
-                
-                # Get the corresponding season code
-                selected_season_code = [code for code, label in available_seasons if label == selected_season_label][0]
-                
-                # Show data info
-                with st.expander("ℹ️ Data Information"):
-                    st.info(f"""
-                    **League:** {league_name}  
-                    **Season:** {selected_season_label}  
-                    **Source:** Your local database  
-                    **Last Update:** Data refreshes when you run download updates
-                    """)
-                
-                # Fetch and display standings
-                with st.spinner(f"Calculating {league_name} standings..."):
-                    standings_df = calculator.calculate_standings(league_name, selected_season_code)
-                    
-                    if standings_df is not None and not standings_df.empty:
-                        st.success(f"✅ Loaded {len(standings_df)} teams • {int(standings_df['Played'].mean())} games played per team")
-                        
-                        # Main standings table
-                        st.subheader(f"📊 {league_name} - {selected_season_label} Season")
-                        
-                        # Prepare display dataframe
-                        display_df = standings_df[['Rank', 'Team', 'Played', 'Won', 'Drawn', 
-                                                   'Lost', 'GF', 'GA', 'GD', 'Points', 'Form']].copy()
-                        
-                        # Add color coding for positions
-                        def highlight_positions(row):
-                            rank = row['Rank']
-                            if rank <= 4:
-                                return ['background-color: #d4edda'] * len(row)  # Champions League (green)
-                            elif rank <= 6:
-                                return ['background-color: #d1ecf1'] * len(row)  # Europa (blue)
-                            elif rank >= len(standings_df) - 2:
-                                return ['background-color: #f8d7da'] * len(row)  # Relegation (red)
-                            return [''] * len(row)
-                        
-                        # Display with styling
-                        st.dataframe(
-                            display_df.style.apply(highlight_positions, axis=1),
-                            use_container_width=True,
-                            height=600
-                        )
-                        
-                        # Legend
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.markdown("🟢 **Champions League** (Top 4)")
-                        with col2:
-                            st.markdown("🔵 **Europa League** (5-6)")
-                        with col3:
-                            st.markdown("🔴 **Relegation** (Bottom 3)")
-                        
-                        st.divider()
-                        
-                        # Additional tables in tabs
-                        sub_tab1, sub_tab2, sub_tab3, sub_tab4 = st.tabs([
-                            "📈 Top Performers", 
-                            "🏠 Home Form", 
-                            "✈️ Away Form",
-                            "🔥 Recent Form"
-                        ])
-                        
-                        with sub_tab1:
-                            st.subheader("📈 Top Performers")
-                            
-                            col1, col2, col3 = st.columns(3)
-                            
-                            with col1:
-                                st.metric("🥇 Top Team", 
-                                         standings_df.iloc[0]['Team'], 
-                                         f"{standings_df.iloc[0]['Points']} pts")
-                                st.caption(f"Played: {standings_df.iloc[0]['Played']} | GD: {standings_df.iloc[0]['GD']:+d}")
-                            
-                            with col2:
-                                top_scorer_team = standings_df.loc[standings_df['GF'].idxmax()]
-                                st.metric("⚽ Best Attack", 
-                                         top_scorer_team['Team'], 
-                                         f"{top_scorer_team['GF']} goals")
-                                st.caption(f"{top_scorer_team['GF'] / top_scorer_team['Played']:.2f} goals per game")
-                            
-                            with col3:
-                                best_defense_team = standings_df.loc[standings_df['GA'].idxmin()]
-                                st.metric("🛡️ Best Defense", 
-                                         best_defense_team['Team'], 
-                                         f"{best_defense_team['GA']} conceded")
-                                st.caption(f"{best_defense_team['GA'] / best_defense_team['Played']:.2f} conceded per game")
-                            
-                            st.divider()
-                            
-                            # Form guide explanation
-                            st.markdown("""
-                            **Form Guide**: Last 5 matches (most recent on right)
-                            - **W** = Win | **D** = Draw | **L** = Loss
-                            - Look for teams with strong recent form (WWWWW, WWDWW, etc.)
-                            """)
-                        
-                        with sub_tab2:
-                            st.subheader("🏠 Home Form Table")
-                            home_df = calculator.get_home_standings(league_name, selected_season_code)
-                            if home_df is not None:
-                                st.dataframe(
-                                    home_df[['Rank', 'Team', 'Played', 'Home_W', 'Home_D', 'Home_L', 'Points']].rename(columns={
-                                        'Home_W': 'Won',
-                                        'Home_D': 'Drawn',
-                                        'Home_L': 'Lost'
-                                    }),
-                                    use_container_width=True,
-                                    height=500
-                                )
-                                st.caption("💡 Shows performance in home matches only")
-                        
-                        with sub_tab3:
-                            st.subheader("✈️ Away Form Table")
-                            away_df = calculator.get_away_standings(league_name, selected_season_code)
-                            if away_df is not None:
-                                st.dataframe(
-                                    away_df[['Rank', 'Team', 'Played', 'Away_W', 'Away_D', 'Away_L', 'Points']].rename(columns={
-                                        'Away_W': 'Won',
-                                        'Away_D': 'Drawn',
-                                        'Away_L': 'Lost'
-                                    }),
-                                    use_container_width=True,
-                                    height=500
-                                )
-                                st.caption("💡 Shows performance in away matches only")
-                        
-                        with sub_tab4:
-                            st.subheader("🔥 Recent Form (Last 5 Matches)")
-                            form_df = calculator.get_form_table(league_name, selected_season_code)
-                            if form_df is not None:
-                                st.dataframe(
-                                    form_df,
-                                    use_container_width=True,
-                                    height=500
-                                )
-                                st.caption("💡 Rankings based on points from last 5 matches only")
-                    
-                    else:
-                        st.warning(f"⚠️ No data available for {league_name} - {selected_season_label}")
-                        st.info("""
-                        **To get standings:**
-                        1. Click the "🔄 Update Database" button in the sidebar
-                        2. Wait for data to download
-                        3. Standings will appear automatically!
-                        """)
-            else:
-                st.warning(f"⚠️ No data available for {league_name}")
-                st.info("""
-                **To get data:**
-                1. Click the "🔄 Update Database" button in the sidebar
-                2. Select leagues to download
-                3. Wait for download to complete
-                4. Refresh this page!
-                """)
-        
-        except ImportError as e:
-            st.error(f"⚠️ Standings calculator not available: {e}")
-            st.info("Please ensure standings_calculator.py is in the utils folder.")
-        except Exception as e:
-            st.error(f"❌ Error calculating standings: {e}")
-            st.code(str(e))
-            st.error(f"❌ Error: {e}")
-            st.info("Make sure your API key is configured correctly in config.py")
+        _standings_tab()
     
     # Tab 4: About
     with tab4:
         st.header("ℹ️ About This System")
         
+        how_it_works, key_features, important_notes, pro_tip = _about_md()
+        
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("🤖 How It Works")
-            st.markdown("""
-            This system uses **XGBoost machine learning** to predict match outcomes:
-            
-            1. **Data Collection**: Historical match data from 2021-2024
-            2. **Feature Engineering**: 30+ statistical features per match
-            3. **Model Training**: Separate models for each league
-            4. **Prediction**: Analyzes team form, statistics, and patterns
-            
-            **Accuracy**: 42-52% (excellent for football prediction!)
-            """)
+            st.markdown(how_it_works)
             
             st.subheader("📊 Key Features")
-            st.markdown("""
-            - Team form (last 5 matches)
-            - Home/Away performance
-            - Goals scored/conceded
-            - Shots accuracy
-            - Disciplinary record
-            - Head-to-head history
-            """)
+            st.markdown(key_features)
         
         with col2:
             st.subheader("🏆 Supported Leagues")
-            for league_info in LEAGUES.values():
-                st.markdown(f"- **{league_info['name']}** ({league_info['country']})")
+            st.markdown(_ABOUT_LEAGUE_MD)
             
             st.subheader("⚠️ Important Notes")
-            st.markdown("""
-            - **Update weekly** for best results
-            - **Check team news** before betting
-            - **52% accuracy is excellent** for football
-            - **Use as guidance**, not guarantee
-            - **Bet responsibly**
-            """)
+            st.markdown(important_notes)
         
         st.divider()
         
-        st.info("""
-        💡 **Pro Tip**: Combine AI predictions with your own knowledge of:
-        - Team injuries and suspensions
-        - Manager tactics
-        - Team motivation
-        - Weather conditions
-        """)
+        st.info(pro_tip)
 
 if __name__ == "__main__":
     main()
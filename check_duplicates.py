@@ -4,6 +4,7 @@ FIXED VERSION - works without match_date column
 """
 import sqlite3
 from pathlib import Path
+from utils.database import DatabaseManager
 
 def check_duplicates():
     """Check for duplicate matches in database"""
@@ -44,21 +45,21 @@ def check_duplicates():
     # Check total matches per team per season
     print("\n📊 Matches per team per season:")
     query2 = """
+    WITH league_matches AS (
+        SELECT m.season, m.home_team_id, m.away_team_id
+        FROM matches m
+        JOIN leagues l ON m.league_id = l.league_id
+        WHERE l.league_name = 'Premier League' AND m.season IN ('2425', '2526')
+    )
     SELECT 
-        l.league_name,
-        m.season,
+        'Premier League' as league_name,
+        lm.season,
         t.team_name,
-        COUNT(DISTINCT m.match_id) as matches_played
-    FROM (
-        SELECT match_id, league_id, season, home_team_id as team_id FROM matches
-        UNION ALL
-        SELECT match_id, league_id, season, away_team_id as team_id FROM matches
-    ) m
-    JOIN teams t ON m.team_id = t.team_id
-    JOIN leagues l ON m.league_id = l.league_id
-    WHERE l.league_name = 'Premier League' AND m.season IN ('2425', '2526')
-    GROUP BY l.league_name, m.season, t.team_name
-    ORDER BY m.season DESC, matches_played DESC
+        COUNT(*) as matches_played
+    FROM league_matches lm
+    JOIN teams t ON t.team_id IN (lm.home_team_id, lm.away_team_id)
+    GROUP BY lm.season, t.team_name
+    ORDER BY lm.season DESC, matches_played DESC
     LIMIT 10
     """
     
@@ -86,13 +87,22 @@ def remove_duplicates():
     print("\n🔧 Removing duplicate matches...")
     
     # Find and delete duplicates, keeping the one with the lowest match_id
-    # This ensures we keep one copy of each unique match
+    # This ensures we keep one copy of each unique match. EXISTS lets SQLite
+    # probe the (home_team_id, away_team_id) index per row and stop at the
+    # first earlier copy, instead of grouping the whole table first. Scores
+    # are compared with IS so rows with missing scores match, as in GROUP BY.
     query = """
     DELETE FROM matches
-    WHERE match_id NOT IN (
-        SELECT MIN(match_id)
-        FROM matches
-        GROUP BY league_id, season, home_team_id, away_team_id, home_goals, away_goals
+    WHERE EXISTS (
+        SELECT 1
+        FROM matches m2
+        WHERE m2.home_team_id = matches.home_team_id
+          AND m2.away_team_id = matches.away_team_id
+          AND m2.league_id = matches.league_id
+          AND m2.season = matches.season
+          AND m2.home_goals IS matches.home_goals
+          AND m2.away_goals IS matches.away_goals
+          AND m2.match_id < matches.match_id
     )
     """
     
@@ -101,6 +111,12 @@ def remove_duplicates():
     conn.commit()
     conn.close()
     
+    # Standings and recent stats tables were built from the duplicated rows
+    if deleted:
+        db = DatabaseManager(db_path)
+        db.refresh_league_standings()
+        db.refresh_team_recent_stats()
+    
     print(f"✅ Removed {deleted} duplicate match records!")
     return deleted
 
@@ -111,7 +127,7 @@ def check_total_matches():
     cursor = conn.cursor()
     
     query = """
-    SELECT COUNT(DISTINCT match_id) as total_matches
+    SELECT COUNT(*) as total_matches
     FROM matches
     """
     
@@ -124,7 +140,7 @@ def check_total_matches():
     query2 = """
     SELECT 
         l.league_name,
-        COUNT(DISTINCT m.match_id) as matches
+        COUNT(*) as matches
     FROM matches m
     JOIN leagues l ON m.league_id = l.league_id
     GROUP BY l.league_name
@@ -16,9 +16,11 @@ PROCESSED_DATA_DIR = DATA_DIR / "processed"
 MODELS_DIR = PROJECT_ROOT / "models"
 DB_PATH = DATA_DIR / "football.db"
 
-# Create directories if they don't exist
-for directory in [RAW_DATA_DIR, PROCESSED_DATA_DIR, MODELS_DIR]:
-    directory.mkdir(parents=True, exist_ok=True)
+def ensure_dirs():
+    """Create the data and model directories if they don't exist (called by entry points)"""
+    for directory in [RAW_DATA_DIR, PROCESSED_DATA_DIR, MODELS_DIR]:
+        if not directory.exists():
+            directory.mkdir(parents=True, exist_ok=True)
 
 # League configurations
 LEAGUES = {
@@ -128,6 +130,7 @@ MODEL_PARAMS = {
         'n_estimators': 200,
         'objective': 'multi:softprob',
         'num_class': 3,
+        'tree_method': 'hist',  # Histogram split finding (xgboost>=2.0 default, pinned here)
         'random_state': 42
     }
 }
@@ -135,6 +138,7 @@ MODEL_PARAMS = {
 # Feature engineering parameters
 FORM_MATCHES = 5
 H2H_MATCHES = 5
+RECENT_STATS_MATCHES = 10  # Window for discipline/attacking stats
 MIN_MATCHES_FOR_PREDICTION = 5
 
 # Prediction thresholds
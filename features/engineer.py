@@ -7,14 +7,44 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
 from utils.database import DatabaseManager
-from config.config import FORM_MATCHES, H2H_MATCHES, LEAGUES
+from config.config import FORM_MATCHES, H2H_MATCHES, LEAGUES, PROCESSED_DATA_DIR, ensure_dirs
+
+# League name -> average goals per match (from config)
+LEAGUE_AVG_GOALS = {info['name']: info['avg_goals'] for info in LEAGUES.values()}
+
+# A match from :team_id's point of view. Points keep the scoring the models were
+# trained with: a home win ('H') counts as a win for either side, and an away
+# team gets a draw's point for any result other than 'H' or 'A'.
+_FORM_COLUMNS = """
+    CASE WHEN home_team_id = :team_id THEN home_goals ELSE away_goals END AS goals_for,
+    CASE WHEN home_team_id = :team_id THEN away_goals ELSE home_goals END AS goals_against,
+    CASE WHEN result = 'H' THEN 3
+         WHEN result = 'D' THEN 1
+         WHEN home_team_id = :team_id OR result = 'A' THEN 0
+         ELSE 1
+    END AS points
+"""
 
 class FeatureEngineer:
     """Calculate features for match prediction"""
     
     def __init__(self):
         self.db = DatabaseManager()
-        
+        # (league_id, date) -> league table before that date, shared by both teams of a match
+        self._league_tables = {}
+        # Form and H2H results by their arguments; a team's form before a date is
+        # the same whichever opponent is being predicted
+        self._form_cache = {}
+        self._h2h_cache = {}
+        # league_id -> league name, loaded on first use
+        self._league_names = {}
+        
+    def clear_caches(self):
+        """Forget cached form, H2H and league tables (call after the matches table changes)"""
+        self._league_tables.clear()
+        self._form_cache.clear()
+        self._h2h_cache.clear()
+    
     def calculate_team_form(self, team_id: int, date: str, 
                            num_matches: int = FORM_MATCHES,
                            home_only: bool = False,
@@ -34,32 +64,89 @@ class FeatureEngineer:
         """
         # Build query based on home/away filter
         if home_only:
-            team_filter = "home_team_id = ?"
-            goals_for = "home_goals"
-            goals_against = "away_goals"
+            team_filter = "home_team_id = :team_id"
         elif away_only:
-            team_filter = "away_team_id = ?"
-            goals_for = "away_goals"
-            goals_against = "home_goals"
+            team_filter = "away_team_id = :team_id"
         else:
-            team_filter = "(home_team_id = ? OR away_team_id = ?)"
+            team_filter = "(home_team_id = :team_id OR away_team_id = :team_id)"
             
         query = f"""
-            SELECT date, home_team_id, away_team_id, 
-                   home_goals, away_goals, result
+            SELECT {_FORM_COLUMNS}
             FROM matches
-            WHERE {team_filter} AND date < ?
+            WHERE {team_filter} AND date < :date
             ORDER BY date DESC
-            LIMIT ?
+            LIMIT :num_matches
         """
         
-        if home_only or away_only:
-            params = (team_id, date, num_matches)
-        else:
-            params = (team_id, team_id, date, num_matches)
+        matches = self.db.execute_query(
+            query, {'team_id': team_id, 'date': date, 'num_matches': num_matches}
+        )
+        
+        return self._summarize_form(matches)
+    
+    def calculate_team_form_with_venue(self, team_id: int, date: str, venue: str,
+                                       num_matches: int = FORM_MATCHES) -> Tuple[Dict, Dict]:
+        """
+        Calculate overall and home-only/away-only form in one query
+        
+        Same results as calculate_team_form() called twice. The query fetches
+        the team's last num_matches home matches and last num_matches away
+        matches (each an index seek on (team, date)); the venue form is one of
+        those lists, and the overall form is the most recent num_matches of both.
+        
+        Args:
+            team_id: Team ID
+            date: Date before which to calculate form
+            venue: 'home' for home-only form, 'away' for away-only form
+            num_matches: Number of recent matches to consider
+        
+        Returns:
+            Tuple of (overall form, venue form) dictionaries
+        """
+        key = (team_id, date, venue, num_matches)
+        if key in self._form_cache:
+            return self._form_cache[key]
+        
+        query = f"""
+            SELECT * FROM (
+                SELECT 1 AS is_home, date, {_FORM_COLUMNS}
+                FROM matches
+                WHERE home_team_id = :team_id AND date < :date
+                ORDER BY date DESC
+                LIMIT :num_matches
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT 0 AS is_home, date, {_FORM_COLUMNS}
+                FROM matches
+                WHERE away_team_id = :team_id AND date < :date
+                ORDER BY date DESC
+                LIMIT :num_matches
+            )
+        """
+        
+        rows = self.db.execute_query(
+            query, {'team_id': team_id, 'date': date, 'num_matches': num_matches}
+        )
+        
+        recent = sorted(rows, key=lambda row: row[1], reverse=True)[:num_matches]
+        overall = [row[2:] for row in recent]
+        venue_matches = [row[2:] for row in rows if row[0] == (venue == 'home')]
+        
+        self._form_cache[key] = (self._summarize_form(overall),
+                                 self._summarize_form(venue_matches))
+        return self._form_cache[key]
+    
+    def _summarize_form(self, matches: List[tuple]) -> Dict:
+        """
+        Form statistics from a team's recent matches
         
-        matches = self.db.execute_query(query, params)
+        Args:
+            matches: Rows of (goals_for, goals_against, points) from _FORM_COLUMNS
         
+        Returns:
+            Dictionary with form statistics
+        """
         if not matches:
             return {
                 'matches_played': 0,
@@ -76,42 +163,16 @@ class FeatureEngineer:
                 'clean_sheets': 0
             }
         
-        points = 0
-        wins = draws = losses = 0
-        goals_scored = goals_conceded = 0
-        clean_sheets = 0
-        
-        for match in matches:
-            match_date, home_id, away_id, home_goals, away_goals, result = match
-            
-            # Determine if team was home or away
-            is_home = home_id == team_id
-            
-            if is_home:
-                team_goals = home_goals
-                opponent_goals = away_goals
-                team_result = result
-            else:
-                team_goals = away_goals
-                opponent_goals = home_goals
-                team_result = 'A' if result == 'H' else ('H' if result == 'A' else 'D')
-            
-            goals_scored += team_goals
-            goals_conceded += opponent_goals
-            
-            if opponent_goals == 0:
-                clean_sheets += 1
-            
-            if team_result == ('H' if is_home else 'A'):
-                wins += 1
-                points += 3
-            elif team_result == 'D':
-                draws += 1
-                points += 1
-            else:
-                losses += 1
+        goals_for, goals_against, match_points = zip(*matches)
         
         matches_played = len(matches)
+        points = sum(match_points)
+        wins = match_points.count(3)
+        draws = match_points.count(1)
+        losses = matches_played - wins - draws
+        goals_scored = sum(goals_for)
+        goals_conceded = sum(goals_against)
+        clean_sheets = goals_against.count(0)
         
         return {
             'matches_played': matches_played,
@@ -143,6 +204,13 @@ class FeatureEngineer:
         Returns:
             Dictionary with H2H statistics
         """
+        key = (team1_id, team2_id, date, num_matches)
+        if key not in self._h2h_cache:
+            self._h2h_cache[key] = self._head_to_head(team1_id, team2_id, date, num_matches)
+        return self._h2h_cache[key]
+    
+    def _head_to_head(self, team1_id: int, team2_id: int, date: str, num_matches: int) -> Dict:
+        """Head-to-head statistics from the database (uncached calculate_head_to_head)"""
         query = """
             SELECT home_team_id, away_team_id, home_goals, away_goals, result, date
             FROM matches
@@ -221,6 +289,44 @@ class FeatureEngineer:
         Returns:
             Dictionary with league position info
         """
+        table = self._get_league_table(league_id, date)
+        total_teams = len(table)
+        team_stats = table.get(team_id)
+        
+        if team_stats is None:
+            return {
+                'position': total_teams + 1,
+                'points': 0,
+                'goal_difference': 0,
+                'position_percentile': 0
+            }
+        
+        position = team_stats['position']
+        
+        return {
+            'position': position,
+            'points': team_stats['points'],
+            'goal_difference': team_stats['gd'],
+            'goals_for': team_stats['gf'],
+            'goals_against': team_stats['ga'],
+            'position_percentile': (total_teams - position + 1) / total_teams if total_teams > 0 else 0
+        }
+    
+    def _get_league_table(self, league_id: int, date: str) -> Dict[int, Dict]:
+        """
+        League table from all league matches before a date, built once per (league, date)
+        
+        Args:
+            league_id: League ID
+            date: Date before which matches count
+        
+        Returns:
+            Dictionary of team_id -> stats (points, gd, gf, ga, position)
+        """
+        key = (league_id, date)
+        if key in self._league_tables:
+            return self._league_tables[key]
+        
         # Get all matches up to this date for the league
         query = """
             SELECT home_team_id, away_team_id, home_goals, away_goals, result
@@ -228,34 +334,33 @@ class FeatureEngineer:
             WHERE league_id = ? AND date < ?
         """
         
-        matches = self.db.execute_query(query, (league_id, date))
-        
-        # Calculate standings
+        # Calculate standings (streamed in batches, the league history can be long)
         standings = {}
         
-        for match in matches:
-            home_id, away_id, home_goals, away_goals, result = match
-            
-            # Initialize teams
-            if home_id not in standings:
-                standings[home_id] = {'points': 0, 'gd': 0, 'gf': 0, 'ga': 0}
-            if away_id not in standings:
-                standings[away_id] = {'points': 0, 'gd': 0, 'gf': 0, 'ga': 0}
-            
-            # Update goals
-            standings[home_id]['gf'] += home_goals
-            standings[home_id]['ga'] += away_goals
-            standings[away_id]['gf'] += away_goals
-            standings[away_id]['ga'] += home_goals
-            
-            # Update points
-            if result == 'H':
-                standings[home_id]['points'] += 3
-            elif result == 'A':
-                standings[away_id]['points'] += 3
-            else:
-                standings[home_id]['points'] += 1
-                standings[away_id]['points'] += 1
+        for batch in self.db.iter_query(query, (league_id, date)):
+            for match in batch:
+                home_id, away_id, home_goals, away_goals, result = match
+                
+                # Initialize teams
+                if home_id not in standings:
+                    standings[home_id] = {'points': 0, 'gd': 0, 'gf': 0, 'ga': 0}
+                if away_id not in standings:
+                    standings[away_id] = {'points': 0, 'gd': 0, 'gf': 0, 'ga': 0}
+                
+                # Update goals
+                standings[home_id]['gf'] += home_goals
+                standings[home_id]['ga'] += away_goals
+                standings[away_id]['gf'] += away_goals
+                standings[away_id]['ga'] += home_goals
+                
+                # Update points
+                if result == 'H':
+                    standings[home_id]['points'] += 3
+                elif result == 'A':
+                    standings[away_id]['points'] += 3
+                else:
+                    standings[home_id]['points'] += 1
+                    standings[away_id]['points'] += 1
         
         # Calculate goal difference
         for team in standings:
@@ -268,32 +373,11 @@ class FeatureEngineer:
             reverse=True
         )
         
-        # Find team position
-        position = None
-        total_teams = len(sorted_teams)
-        
         for idx, (tid, stats) in enumerate(sorted_teams, 1):
-            if tid == team_id:
-                position = idx
-                team_stats = stats
-                break
-        
-        if position is None:
-            return {
-                'position': total_teams + 1,
-                'points': 0,
-                'goal_difference': 0,
-                'position_percentile': 0
-            }
+            stats['position'] = idx
         
-        return {
-            'position': position,
-            'points': team_stats['points'],
-            'goal_difference': team_stats['gd'],
-            'goals_for': team_stats['gf'],
-            'goals_against': team_stats['ga'],
-            'position_percentile': (total_teams - position + 1) / total_teams if total_teams > 0 else 0
-        }
+        self._league_tables[key] = standings
+        return standings
     
     def get_match_features(self, home_team_id: int, away_team_id: int, 
                           league_id: int, date: str) -> Dict:
@@ -311,13 +395,9 @@ class FeatureEngineer:
         """
         features = {}
         
-        # Overall form (last 5 matches)
-        home_form = self.calculate_team_form(home_team_id, date)
-        away_form = self.calculate_team_form(away_team_id, date)
-        
-        # Home/Away specific form
-        home_form_home = self.calculate_team_form(home_team_id, date, home_only=True)
-        away_form_away = self.calculate_team_form(away_team_id, date, away_only=True)
+        # Overall form (last 5 matches) and home/away specific form
+        home_form, home_form_home = self.calculate_team_form_with_venue(home_team_id, date, 'home')
+        away_form, away_form_away = self.calculate_team_form_with_venue(away_team_id, date, 'away')
         
         # Head to head
         h2h = self.calculate_head_to_head(home_team_id, away_team_id, date)
@@ -365,15 +445,12 @@ class FeatureEngineer:
                                  (away_form['goals_per_match'] - away_form['goals_conceded_per_match'])
         
         # Get league average goals (from config)
-        league_name = self.db.execute_query(
-            "SELECT league_name FROM leagues WHERE league_id = ?", 
-            (league_id,)
-        )[0][0]
+        if league_id not in self._league_names:
+            self._league_names = dict(self.db.execute_query("SELECT league_id, league_name FROM leagues"))
+        league_name = self._league_names[league_id]
         
-        for league_key, league_info in LEAGUES.items():
-            if league_info['name'] == league_name:
-                features['league_avg_goals'] = league_info['avg_goals']
-                break
+        if league_name in LEAGUE_AVG_GOALS:
+            features['league_avg_goals'] = LEAGUE_AVG_GOALS[league_name]
         
         return features
     
@@ -383,6 +460,12 @@ class FeatureEngineer:
         """
         Create a complete training dataset with features and labels
         
+        Produces the same features as get_match_features() for every match,
+        but loads the matches once and computes form, head-to-head and league
+        position for all of them with pandas/numpy instead of querying the
+        database per match. Matches where either team has no earlier match
+        are left out (no form to compute), as before.
+        
         Args:
             league_id: Filter by league (None for all leagues)
             start_date: Start date filter
@@ -391,67 +474,337 @@ class FeatureEngineer:
         Returns:
             DataFrame with features and target variable
         """
-        # Build query
-        query = """
+        # Form and H2H look at a team's whole history, so load every match
+        matches = self.db.get_dataframe("""
             SELECT match_id, league_id, date, 
-                   home_team_id, away_team_id, result
+                   home_team_id, away_team_id,
+                   home_goals, away_goals, result
             FROM matches
-            WHERE 1=1
-        """
-        params = []
+            ORDER BY date, match_id
+        """)
         
+        target = matches
         if league_id:
-            query += " AND league_id = ?"
-            params.append(league_id)
+            target = target[target['league_id'] == league_id]
         if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
+            target = target[target['date'] >= start_date]
         if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
+            target = target[target['date'] <= end_date]
+        target = target.reset_index(drop=True)
+        
+        print(f"Creating features for {len(target)} matches...")
+        
+        if target.empty:
+            return pd.DataFrame()
+        
+        day = self._day_numbers(matches['date'])
+        target_day = self._day_numbers(target['date'])
+        
+        home_form, home_form_home = self._form_features(matches, day, target['home_team_id'], target_day, 'home')
+        away_form, away_form_away = self._form_features(matches, day, target['away_team_id'], target_day, 'away')
+        h2h = self._h2h_features(matches, day, target, target_day)
+        home_position, away_position = self._position_features(matches, day, target, target_day)
+        
+        # Same feature order as get_match_features()
+        columns = {
+            'home_points_last5': home_form['points'],
+            'home_goals_per_match': home_form['goals_per_match'],
+            'home_goals_conceded_per_match': home_form['goals_conceded_per_match'],
+            'home_win_rate': home_form['win_rate'],
+            'home_form_home_points': home_form_home['points'],
+            'home_clean_sheet_rate': home_form['clean_sheet_rate'],
+            'away_points_last5': away_form['points'],
+            'away_goals_per_match': away_form['goals_per_match'],
+            'away_goals_conceded_per_match': away_form['goals_conceded_per_match'],
+            'away_win_rate': away_form['win_rate'],
+            'away_form_away_points': away_form_away['points'],
+            'away_clean_sheet_rate': away_form['clean_sheet_rate'],
+            'home_position': home_position['position'],
+            'away_position': away_position['position'],
+            'position_diff': away_position['position'] - home_position['position'],
+            'home_points_total': home_position['points'],
+            'away_points_total': away_position['points'],
+            'home_goal_difference': home_position['goal_difference'],
+            'away_goal_difference': away_position['goal_difference'],
+            'h2h_matches': h2h['h2h_matches'],
+            'h2h_home_wins': h2h['team1_wins'],
+            'h2h_draws': h2h['draws'],
+            'h2h_away_wins': h2h['team2_wins'],
+            'h2h_home_win_rate': h2h['team1_win_rate'],
+            'h2h_avg_goals': h2h['total_goals_avg'],
+            'form_diff': home_form['points'] - away_form['points'],
+            'goals_diff': (home_form['goals_per_match'] - home_form['goals_conceded_per_match']) -
+                          (away_form['goals_per_match'] - away_form['goals_conceded_per_match']),
+        }
+        
+        # League average goals (from config)
+        league_names = dict(self.db.execute_query("SELECT league_id, league_name FROM leagues"))
+        columns['league_avg_goals'] = target['league_id'].map(league_names).map(LEAGUE_AVG_GOALS).to_numpy()
+        
+        # Add identifiers and target variable
+        for col in ['match_id', 'date', 'home_team_id', 'away_team_id', 'league_id', 'result']:
+            columns[col] = target[col].to_numpy()
+        
+        # Teams without any earlier match have no form features
+        has_form = (home_form['matches_played'] > 0) & (away_form['matches_played'] > 0)
+        skipped = int((~has_form).sum())
+        if skipped:
+            print(f"Skipped {skipped} matches without earlier matches for both teams")
+        
+        # Filter the column arrays and wrap them in a frame without copying,
+        # rather than growing it column by column and copying it to filter rows
+        df = pd.DataFrame({name: values[has_form] for name, values in columns.items()}, copy=False)
+        
+        print(f"\n✓ Created dataset with {len(df)} matches and {len(df.columns)} features")
+        
+        return df
+    
+    @staticmethod
+    def _day_numbers(dates: pd.Series) -> np.ndarray:
+        """Convert 'YYYY-MM-DD' strings to integer day numbers"""
+        return pd.to_datetime(dates).to_numpy().astype('datetime64[D]').astype(np.int64)
+    
+    @staticmethod
+    def _window_before(group: np.ndarray, day: np.ndarray, values: np.ndarray,
+                       query_group: np.ndarray, query_day: np.ndarray,
+                       window: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sum each group's last `window` rows strictly before a given day
+        
+        Args:
+            group: Group key per row (e.g. team ID)
+            day: Day number per row
+            values: Array (rows x columns) of values to sum
+            query_group: Group key per query
+            query_day: Day number per query
+            window: Maximum number of rows to sum
+        
+        Returns:
+            Tuple of (rows summed, column sums) per query
+        """
+        order = np.lexsort((day, group))
+        group, day, values = group[order], day[order], values[order]
         
-        query += " ORDER BY date"
+        # One sorted (group, day) key, so a single searchsorted serves every group
+        span = int(max(day.max(), query_day.max())) + 1
+        key = group.astype(np.int64) * span + day
+        query_group = query_group.astype(np.int64)
         
-        matches = self.db.execute_query(query, tuple(params))
+        end = np.searchsorted(key, query_group * span + query_day, side='left')
+        group_start = np.searchsorted(key, query_group * span, side='left')
+        start = np.maximum(end - window, group_start)
         
-        print(f"Creating features for {len(matches)} matches...")
+        csum = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+        return end - start, csum[end] - csum[start]
+    
+    def _form_features(self, matches: pd.DataFrame, day: np.ndarray,
+                       team_ids: pd.Series, query_day: np.ndarray,
+                       venue: str) -> Tuple[Dict, Dict]:
+        """
+        Overall and venue-specific form, as calculate_team_form() computes it
+        
+        Args:
+            matches: All matches
+            day: Day number per match
+            team_ids: Team per query
+            query_day: Day number per query (form uses matches before it)
+            venue: 'home' or 'away', the venue of the venue-specific form
+        
+        Returns:
+            Tuple of (overall form, venue form) dicts of arrays
+        """
+        result = matches['result'].to_numpy()
+        home_goals = matches['home_goals'].to_numpy()
+        away_goals = matches['away_goals'].to_numpy()
+        
+        # Points and wins per side, scored exactly like calculate_team_form()
+        home_win = result == 'H'
+        home_points = np.where(home_win, 3, np.where(result == 'D', 1, 0))
+        away_win = result == 'H'
+        away_points = np.where(away_win, 3, np.where(result == 'A', 0, 1))
+        
+        # Long format: one row per team per match (home rows, then away rows)
+        team = np.concatenate([matches['home_team_id'].to_numpy(), matches['away_team_id'].to_numpy()])
+        team_day = np.concatenate([day, day])
+        values = np.column_stack([
+            np.concatenate([home_points, away_points]),
+            np.concatenate([home_win, away_win]),
+            np.concatenate([home_goals, away_goals]),
+            np.concatenate([away_goals, home_goals]),
+            np.concatenate([away_goals == 0, home_goals == 0]),
+        ]).astype(float)
+        is_home = np.arange(len(team)) < len(matches)
+        
+        query_team = team_ids.to_numpy()
+        
+        played, sums = self._window_before(team, team_day, values, query_team, query_day, FORM_MATCHES)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            per_match = np.where(played[:, None] > 0, sums / played[:, None], 0)
+        
+        overall = {
+            'matches_played': played,
+            'points': sums[:, 0].astype(int),
+            'win_rate': per_match[:, 1],
+            'goals_per_match': per_match[:, 2],
+            'goals_conceded_per_match': per_match[:, 3],
+            'clean_sheet_rate': per_match[:, 4],
+        }
+        
+        # Home-only or away-only form (points only, as used in the features)
+        venue_rows = is_home if venue == 'home' else ~is_home
+        _, venue_sums = self._window_before(
+            team[venue_rows], team_day[venue_rows], values[venue_rows, :1],
+            query_team, query_day, FORM_MATCHES
+        )
+        venue = {'points': venue_sums[:, 0].astype(int)}
+        
+        return overall, venue
+    
+    def _h2h_features(self, matches: pd.DataFrame, day: np.ndarray,
+                      target: pd.DataFrame, query_day: np.ndarray) -> Dict:
+        """
+        Head-to-head stats for each target match, as calculate_head_to_head() computes them
+        
+        Args:
+            matches: All matches
+            day: Day number per match
+            target: Matches to compute features for (team1 is the home team)
+            query_day: Day number per target match
+        
+        Returns:
+            Dictionary of arrays keyed like calculate_head_to_head()
+        """
+        home = matches['home_team_id'].to_numpy()
+        away = matches['away_team_id'].to_numpy()
+        result = matches['result'].to_numpy()
+        
+        # Key each fixture by its unordered team pair, counted from the lower ID's side
+        low = np.minimum(home, away)
+        pair = low.astype(np.int64) * 100000 + np.maximum(home, away)
+        low_win = np.where(home == low, result == 'H', result == 'A')
+        draw = result == 'D'
+        values = np.column_stack([
+            low_win,
+            draw,
+            ~low_win & ~draw,
+            matches['home_goals'].to_numpy() + matches['away_goals'].to_numpy(),
+        ]).astype(float)
+        
+        query_home = target['home_team_id'].to_numpy()
+        query_away = target['away_team_id'].to_numpy()
+        query_low = np.minimum(query_home, query_away)
+        query_pair = query_low.astype(np.int64) * 100000 + np.maximum(query_home, query_away)
+        
+        played, sums = self._window_before(pair, day, values, query_pair, query_day, H2H_MATCHES)
+        
+        home_is_low = query_home == query_low
+        team1_wins = np.where(home_is_low, sums[:, 0], sums[:, 2]).astype(int)
+        team2_wins = np.where(home_is_low, sums[:, 2], sums[:, 0]).astype(int)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {
+                'h2h_matches': played,
+                'team1_wins': team1_wins,
+                'draws': sums[:, 1].astype(int),
+                'team2_wins': team2_wins,
+                'team1_win_rate': np.where(played > 0, team1_wins / played, 0),
+                'total_goals_avg': np.where(played > 0, sums[:, 3] / played, 0),
+            }
+    
+    def _position_features(self, matches: pd.DataFrame, day: np.ndarray,
+                           target: pd.DataFrame, query_day: np.ndarray) -> Tuple[Dict, Dict]:
+        """
+        League position before each target match, as calculate_league_position() computes it
+        
+        Builds each league's cumulative table once per match day (days x teams)
+        instead of re-aggregating the league history for every match.
+        
+        Args:
+            matches: All matches (sorted by date, match_id)
+            day: Day number per match
+            target: Matches to compute features for
+            query_day: Day number per target match
         
-        dataset = []
+        Returns:
+            Tuple of (home team, away team) dicts with position, points and goal_difference arrays
+        """
+        n = len(target)
+        home_out = {key: np.zeros(n, dtype=np.int64) for key in ['position', 'points', 'goal_difference']}
+        away_out = {key: np.zeros(n, dtype=np.int64) for key in ['position', 'points', 'goal_difference']}
+        
+        target_league = target['league_id'].to_numpy()
         
-        for idx, match in enumerate(matches):
-            match_id, league_id, date, home_team_id, away_team_id, result = match
+        for lid in np.unique(target_league):
+            in_league = (matches['league_id'] == lid).to_numpy()
+            league = matches[in_league]
+            league_day = day[in_league]
             
-            if (idx + 1) % 100 == 0:
-                print(f"Processing match {idx + 1}/{len(matches)}")
+            home = league['home_team_id'].to_numpy()
+            away = league['away_team_id'].to_numpy()
+            result = league['result'].to_numpy()
             
-            try:
-                features = self.get_match_features(
-                    home_team_id, away_team_id, league_id, date
-                )
-                
-                # Add identifiers
-                features['match_id'] = match_id
-                features['date'] = date
-                features['home_team_id'] = home_team_id
-                features['away_team_id'] = away_team_id
-                features['league_id'] = league_id
+            # Ties on (points, GD, GF) keep the order teams first appeared in
+            appearance = np.column_stack([home, away]).ravel()
+            teams, first_seen = np.unique(appearance, return_index=True)
+            home_idx = np.searchsorted(teams, home)
+            away_idx = np.searchsorted(teams, away)
+            
+            days, day_idx = np.unique(league_day, return_inverse=True)
+            shape = (len(days), len(teams))
+            
+            # Per-day totals for each team, then the table after each day
+            draw_points = ~np.isin(result, ['H', 'A'])
+            points = np.zeros(shape)
+            goals_for = np.zeros(shape)
+            goals_against = np.zeros(shape)
+            played = np.zeros(shape)
+            np.add.at(points, (day_idx, home_idx), np.where(result == 'H', 3, draw_points))
+            np.add.at(points, (day_idx, away_idx), np.where(result == 'A', 3, draw_points))
+            np.add.at(goals_for, (day_idx, home_idx), league['home_goals'].to_numpy())
+            np.add.at(goals_for, (day_idx, away_idx), league['away_goals'].to_numpy())
+            np.add.at(goals_against, (day_idx, home_idx), league['away_goals'].to_numpy())
+            np.add.at(goals_against, (day_idx, away_idx), league['home_goals'].to_numpy())
+            np.add.at(played, (day_idx, home_idx), 1)
+            np.add.at(played, (day_idx, away_idx), 1)
+            
+            points = np.cumsum(points, axis=0).astype(np.int64)
+            goals_for = np.cumsum(goals_for, axis=0).astype(np.int64)
+            goal_difference = goals_for - np.cumsum(goals_against, axis=0).astype(np.int64)
+            appeared = np.cumsum(played, axis=0) > 0
+            
+            # Sort key for (points, GD, GF), packed into one integer
+            rank_key = (points << 42) + ((goal_difference + (1 << 20)) << 21) + goals_for
+            
+            rows = np.flatnonzero(target_league == lid)
+            # Table as of the last match day before each target match (-1: none yet)
+            before = np.searchsorted(days, query_day[rows], side='left') - 1
+            
+            for team_col, out in [('home_team_id', home_out), ('away_team_id', away_out)]:
+                query_team = target[team_col].to_numpy()[rows]
+                t = np.searchsorted(teams, query_team)
+                known = (t < len(teams)) & (teams[np.minimum(t, len(teams) - 1)] == query_team) & (before >= 0)
+                t = np.where(known, t, 0)
+                b = np.maximum(before, 0)
                 
-                # Add target variable
-                features['result'] = result
+                table_appeared = appeared[b] & (before >= 0)[:, None]
+                total_teams = table_appeared.sum(axis=1)
+                in_table = known & table_appeared[np.arange(len(rows)), t]
                 
-                dataset.append(features)
+                team_key = rank_key[b, t][:, None]
+                ahead = table_appeared & (
+                    (rank_key[b] > team_key) |
+                    ((rank_key[b] == team_key) & (first_seen[None, :] < first_seen[t][:, None]))
+                )
                 
-            except Exception as e:
-                print(f"Error processing match {match_id}: {e}")
-                continue
+                out['position'][rows] = np.where(in_table, ahead.sum(axis=1) + 1, total_teams + 1)
+                out['points'][rows] = np.where(in_table, points[b, t], 0)
+                out['goal_difference'][rows] = np.where(in_table, goal_difference[b, t], 0)
         
-        df = pd.DataFrame(dataset)
-        print(f"\n✓ Created dataset with {len(df)} matches and {len(df.columns)} features")
-        
-        return df
+        return home_out, away_out
 
 def main():
     """Test feature engineering"""
+    ensure_dirs()
     engineer = FeatureEngineer()
     
     # Create training dataset for Premier League
@@ -464,9 +817,9 @@ def main():
     print(f"\nFirst few rows:")
     print(df.head())
     
-    # Save to CSV
-    output_path = "/home/claude/football-predictor/data/processed/training_data.csv"
-    df.to_csv(output_path, index=False)
+    # Save to Parquet (typed and compressed; reloads much faster than CSV)
+    output_path = PROCESSED_DATA_DIR / "training_data.parquet"
+    df.to_parquet(output_path, engine='pyarrow', compression='zstd', index=False)
     print(f"\n✓ Saved to {output_path}")
 
 if __name__ == "__main__":
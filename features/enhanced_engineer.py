@@ -2,18 +2,134 @@
 Enhanced Feature Engineering with Real-time Data
 Includes injuries, cards, recent form, and advanced stats
 """
+from config.config import RECENT_STATS_MATCHES
 from features.engineer import FeatureEngineer
 from utils.database import DatabaseManager
-from typing import Dict
+from typing import Dict, List, Tuple
 import json
+import sqlite3
+
+# A team's own side of each stat, in the order the discipline/attack features read them
+_OWN_STATS_COLUMNS = ", ".join(
+    f"COALESCE(CASE WHEN home_team_id = team_id THEN home_{stat} ELSE away_{stat} END, 0) AS {stat}"
+    for stat in ('yellow', 'red', 'fouls', 'shots', 'shots_on_target', 'corners', 'goals')
+)
+
+# _recent_stats() totals for a team with no earlier matches
+_NO_RECENT_STATS = (0,) * 8
 
 class EnhancedFeatureEngineer(FeatureEngineer):
     """Extended feature engineer with real-time team news"""
     
     def __init__(self):
         super().__init__()
+        # Per-team results by their arguments, like the base class's form cache;
+        # a team's recent stats are shared by all its fixtures. Injuries are
+        # current news rather than history, so they are always queried fresh
+        self._recent_stats_cache = {}
+        # team_injuries is optional (created by setup_database.py); check once
+        self._has_injuries = bool(self.db.execute_query(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'team_injuries'"
+        ))
+        
+    def clear_caches(self):
+        """Forget cached form, H2H, league tables and recent stats"""
+        super().clear_caches()
+        self._recent_stats_cache.clear()
+    
+    def _recent_stats(self, team_id: int, date: str,
+                      num_matches: int = RECENT_STATS_MATCHES) -> tuple:
+        """
+        Get the match stat totals used by the discipline and attacking features
+        
+        Args:
+            team_id: Team ID
+            date: Date before which to calculate
+            num_matches: Number of recent matches
+        
+        Returns:
+            Tuple of (matches_played, yellow, red, fouls, shots, shots_on_target,
+            corners, goals), the stats being the team's own totals over those matches
+        """
+        return self._recent_stats_for_teams((team_id,), date, num_matches)[team_id]
+    
+    def _recent_stats_for_teams(self, team_ids: Tuple[int, ...], date: str,
+                                num_matches: int = RECENT_STATS_MATCHES) -> Dict[int, tuple]:
+        """
+        Get _recent_stats() totals for several teams in one query
+        
+        Args:
+            team_ids: Team IDs
+            date: Date before which to calculate
+            num_matches: Number of recent matches per team
+        
+        Returns:
+            Dictionary of team_id -> totals
+        """
+        missing = [team_id for team_id in team_ids
+                   if (team_id, date, num_matches) not in self._recent_stats_cache]
+        if missing:
+            for team_id, totals in self._query_recent_stats(missing, date, num_matches).items():
+                self._recent_stats_cache[(team_id, date, num_matches)] = totals
         
-    def calculate_discipline_record(self, team_id: int, date: str, num_matches: int = 10) -> Dict:
+        return {team_id: self._recent_stats_cache[(team_id, date, num_matches)] for team_id in team_ids}
+    
+    def _query_recent_stats(self, team_ids: List[int], date: str,
+                            num_matches: int) -> Dict[int, tuple]:
+        """Run the recent stats query for team_ids (teams without matches get zeros)"""
+        totals = dict.fromkeys(team_ids, _NO_RECENT_STATS)
+        
+        if num_matches == RECENT_STATS_MATCHES:
+            # Latest precomputed window before the date (see refresh_team_recent_stats)
+            team_query = """
+                SELECT * FROM (
+                    SELECT team_id, matches_played, yellow, red, fouls,
+                           shots, shots_on_target, corners, goals
+                    FROM team_recent_stats
+                    WHERE team_id = ? AND as_of_date < ?
+                    ORDER BY as_of_date DESC
+                    LIMIT 1
+                )
+            """
+            params = tuple(p for team_id in team_ids for p in (team_id, date))
+            try:
+                rows = self.db.execute_query(" UNION ALL ".join([team_query] * len(team_ids)), params)
+            except sqlite3.OperationalError:
+                # Table not built yet; compute from matches below
+                pass
+            else:
+                totals.update((row[0], row[1:]) for row in rows)
+                return totals
+        
+        # One LIMITed subquery per team keeps each team's window exact; the
+        # outer select picks the team's side of each stat
+        team_query = f"""
+            SELECT team_id, {_OWN_STATS_COLUMNS} FROM (
+                SELECT ? AS team_id, home_team_id,
+                       home_yellow, away_yellow, home_red, away_red,
+                       home_fouls, away_fouls,
+                       home_shots, away_shots, home_shots_on_target, away_shots_on_target,
+                       home_corners, away_corners, home_goals, away_goals
+                FROM matches
+                WHERE (home_team_id = ? OR away_team_id = ?) AND date < ?
+                ORDER BY date DESC
+                LIMIT ?
+            )
+        """
+        query = f"""
+            SELECT team_id, COUNT(*), SUM(yellow), SUM(red), SUM(fouls),
+                   SUM(shots), SUM(shots_on_target), SUM(corners), SUM(goals)
+            FROM ({" UNION ALL ".join([team_query] * len(team_ids))})
+            GROUP BY team_id
+        """
+        params = tuple(p for team_id in team_ids for p in (team_id, team_id, team_id, date, num_matches))
+        
+        totals.update((row[0], row[1:]) for row in self.db.execute_query(query, params))
+        return totals
+    
+    def calculate_discipline_record(self, team_id: int, date: str,
+                                    num_matches: int = RECENT_STATS_MATCHES,
+                                    totals: tuple = None) -> Dict:
         """
         Calculate team's discipline record (cards, fouls)
         
@@ -21,22 +137,17 @@ class EnhancedFeatureEngineer(FeatureEngineer):
             team_id: Team ID
             date: Date before which to calculate
             num_matches: Number of recent matches
+            totals: Totals from _recent_stats() (fetched if not given)
         
         Returns:
             Dictionary with discipline stats
         """
-        query = """
-            SELECT home_yellow, away_yellow, home_red, away_red,
-                   home_fouls, away_fouls, home_team_id
-            FROM matches
-            WHERE (home_team_id = ? OR away_team_id = ?) AND date < ?
-            ORDER BY date DESC
-            LIMIT ?
-        """
+        if totals is None:
+            totals = self._recent_stats(team_id, date, num_matches)
         
-        matches = self.db.execute_query(query, (team_id, team_id, date, num_matches))
+        num_matches_actual, total_yellows, total_reds, total_fouls = totals[:4]
         
-        if not matches:
+        if not num_matches_actual:
             return {
                 'avg_yellow_cards': 0,
                 'avg_red_cards': 0,
@@ -44,26 +155,6 @@ class EnhancedFeatureEngineer(FeatureEngineer):
                 'discipline_score': 0  # Lower is better
             }
         
-        total_yellows = 0
-        total_reds = 0
-        total_fouls = 0
-        
-        for match in matches:
-            home_yellow, away_yellow, home_red, away_red, home_fouls, away_fouls, home_id = match
-            
-            is_home = home_id == team_id
-            
-            if is_home:
-                total_yellows += home_yellow or 0
-                total_reds += home_red or 0
-                total_fouls += home_fouls or 0
-            else:
-                total_yellows += away_yellow or 0
-                total_reds += away_red or 0
-                total_fouls += away_fouls or 0
-        
-        num_matches_actual = len(matches)
-        
         return {
             'avg_yellow_cards': total_yellows / num_matches_actual,
             'avg_red_cards': total_reds / num_matches_actual,
@@ -71,7 +162,9 @@ class EnhancedFeatureEngineer(FeatureEngineer):
             'discipline_score': (total_yellows + total_reds * 3 + total_fouls * 0.1) / num_matches_actual
         }
     
-    def calculate_attacking_threat(self, team_id: int, date: str, num_matches: int = 10) -> Dict:
+    def calculate_attacking_threat(self, team_id: int, date: str,
+                                   num_matches: int = RECENT_STATS_MATCHES,
+                                   totals: tuple = None) -> Dict:
         """
         Calculate attacking threat metrics
         
@@ -79,22 +172,18 @@ class EnhancedFeatureEngineer(FeatureEngineer):
             team_id: Team ID
             date: Date before which to calculate
             num_matches: Number of recent matches
+            totals: Totals from _recent_stats() (fetched if not given)
         
         Returns:
             Dictionary with attacking stats
         """
-        query = """
-            SELECT home_shots, away_shots, home_shots_on_target, away_shots_on_target,
-                   home_corners, away_corners, home_goals, away_goals, home_team_id
-            FROM matches
-            WHERE (home_team_id = ? OR away_team_id = ?) AND date < ?
-            ORDER BY date DESC
-            LIMIT ?
-        """
+        if totals is None:
+            totals = self._recent_stats(team_id, date, num_matches)
         
-        matches = self.db.execute_query(query, (team_id, team_id, date, num_matches))
+        num_matches_actual = totals[0]
+        total_shots, total_shots_on_target, total_corners, total_goals = totals[4:]
         
-        if not matches:
+        if not num_matches_actual:
             return {
                 'avg_shots': 0,
                 'avg_shots_on_target': 0,
@@ -103,29 +192,6 @@ class EnhancedFeatureEngineer(FeatureEngineer):
                 'conversion_rate': 0
             }
         
-        total_shots = 0
-        total_shots_on_target = 0
-        total_corners = 0
-        total_goals = 0
-        
-        for match in matches:
-            h_shots, a_shots, h_sot, a_sot, h_corners, a_corners, h_goals, a_goals, home_id = match
-            
-            is_home = home_id == team_id
-            
-            if is_home:
-                total_shots += h_shots or 0
-                total_shots_on_target += h_sot or 0
-                total_corners += h_corners or 0
-                total_goals += h_goals or 0
-            else:
-                total_shots += a_shots or 0
-                total_shots_on_target += a_sot or 0
-                total_corners += a_corners or 0
-                total_goals += a_goals or 0
-        
-        num_matches_actual = len(matches)
-        
         shot_accuracy = (total_shots_on_target / total_shots * 100) if total_shots > 0 else 0
         conversion_rate = (total_goals / total_shots * 100) if total_shots > 0 else 0
         
@@ -148,32 +214,48 @@ class EnhancedFeatureEngineer(FeatureEngineer):
         Returns:
             Dictionary with injury impact
         """
-        # Check if we have injury data
-        query = """
-            SELECT COUNT(*) as injury_count, 
+        return self._get_injury_impacts((team_id,))[team_id]
+    
+    def _get_injury_impacts(self, team_ids: Tuple[int, ...]) -> Dict[int, Dict]:
+        """
+        Get injury impact for several teams in one query
+        
+        Args:
+            team_ids: Team IDs
+        
+        Returns:
+            Dictionary of team_id -> injury impact (as get_injury_impact())
+        """
+        impacts = {
+            team_id: {
+                'total_injuries': 0,
+                'major_injuries': 0,
+                'injury_impact_score': 0
+            }
+            for team_id in team_ids
+        }
+        
+        if not self._has_injuries:
+            return impacts
+        
+        placeholders = ', '.join('?' * len(team_ids))
+        query = f"""
+            SELECT team_id,
+                   COUNT(*) as injury_count, 
                    SUM(CASE WHEN severity = 'major' THEN 1 ELSE 0 END) as major_injuries
             FROM team_injuries
-            WHERE team_id = ? AND status = 'out'
-        """
-        
-        try:
-            result = self.db.execute_query(query, (team_id,))
-            if result:
-                injury_count, major_injuries = result[0]
-                return {
-                    'total_injuries': injury_count or 0,
-                    'major_injuries': major_injuries or 0,
-                    'injury_impact_score': (injury_count * 0.5 + major_injuries * 2) if injury_count else 0
-                }
-        except:
-            # Table doesn't exist yet
-            pass
+            WHERE team_id IN ({placeholders}) AND status = 'out'
+            GROUP BY team_id
+        """
         
-        return {
-            'total_injuries': 0,
-            'major_injuries': 0,
-            'injury_impact_score': 0
-        }
+        for team_id, injury_count, major_injuries in self.db.execute_query(query, team_ids):
+            impacts[team_id] = {
+                'total_injuries': injury_count or 0,
+                'major_injuries': major_injuries or 0,
+                'injury_impact_score': (injury_count * 0.5 + major_injuries * 2) if injury_count else 0
+            }
+        
+        return impacts
     
     def get_enhanced_match_features(self, home_team_id: int, away_team_id: int,
                                    league_id: int, date: str) -> Dict:
@@ -192,9 +274,14 @@ class EnhancedFeatureEngineer(FeatureEngineer):
         # Get base features
         features = self.get_match_features(home_team_id, away_team_id, league_id, date)
         
+        # Recent match stats for both teams in one query, shared by discipline and attack
+        recent = self._recent_stats_for_teams((home_team_id, away_team_id), date)
+        home_recent = recent[home_team_id]
+        away_recent = recent[away_team_id]
+        
         # Add discipline records
-        home_discipline = self.calculate_discipline_record(home_team_id, date)
-        away_discipline = self.calculate_discipline_record(away_team_id, date)
+        home_discipline = self.calculate_discipline_record(home_team_id, date, totals=home_recent)
+        away_discipline = self.calculate_discipline_record(away_team_id, date, totals=away_recent)
         
         features['home_discipline_score'] = home_discipline['discipline_score']
         features['home_avg_yellow_cards'] = home_discipline['avg_yellow_cards']
@@ -205,8 +292,8 @@ class EnhancedFeatureEngineer(FeatureEngineer):
         features['away_avg_red_cards'] = away_discipline['avg_red_cards']
         
         # Add attacking threat
-        home_attack = self.calculate_attacking_threat(home_team_id, date)
-        away_attack = self.calculate_attacking_threat(away_team_id, date)
+        home_attack = self.calculate_attacking_threat(home_team_id, date, totals=home_recent)
+        away_attack = self.calculate_attacking_threat(away_team_id, date, totals=away_recent)
         
         features['home_avg_shots'] = home_attack['avg_shots']
         features['home_shot_accuracy'] = home_attack['shot_accuracy']
@@ -217,8 +304,9 @@ class EnhancedFeatureEngineer(FeatureEngineer):
         features['away_conversion_rate'] = away_attack['conversion_rate']
         
         # Add injury impact (if available)
-        home_injuries = self.get_injury_impact(home_team_id)
-        away_injuries = self.get_injury_impact(away_team_id)
+        injuries = self._get_injury_impacts((home_team_id, away_team_id))
+        home_injuries = injuries[home_team_id]
+        away_injuries = injuries[away_team_id]
         
         features['home_injury_impact'] = home_injuries['injury_impact_score']
         features['away_injury_impact'] = away_injuries['injury_impact_score']
@@ -4,17 +4,37 @@ Football Prediction System - Command Line Interface
 """
 import argparse
 import sys
+from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+# Scrapers, models and prediction (pandas/sklearn/xgboost) are imported by the
+# commands that use them, so status/teams start without loading them
 from utils.database import DatabaseManager
-from scrapers.historical_downloader import HistoricalDataDownloader
-from features.engineer import FeatureEngineer
-from models.train import MatchPredictor
-from prediction.predict import FootballPredictor
-from config.config import LEAGUES
+from config.config import LEAGUES, MODELS_DIR, ensure_dirs
+
+# Lower-cased league name or key -> league key, for the --league options
+_LEAGUE_KEYS = {
+    alias: key
+    for key, info in LEAGUES.items()
+    for alias in (key, info['name'].lower())
+}
+
+# League name -> league_id, loaded from the database on first use
+_LEAGUE_IDS = {}
+
+def find_league(league: str) -> Optional[str]:
+    """Get the league key for a league name or key (None if unknown)"""
+    return _LEAGUE_KEYS.get(league.lower())
+
+def get_league_id(db: DatabaseManager, league_key: str) -> Optional[int]:
+    """Get the database ID of a league (None if it isn't in the database)"""
+    if not _LEAGUE_IDS:
+        _LEAGUE_IDS.update(db.execute_query("SELECT league_name, league_id FROM leagues"))
+    return _LEAGUE_IDS.get(LEAGUES[league_key]['name'])
 
 def setup_database():
     """Initialize database"""
@@ -22,19 +42,22 @@ def setup_database():
     db = DatabaseManager()
     db.initialize_database()
     
-    # Insert leagues
-    for league_key, league_info in LEAGUES.items():
-        league_id = db.insert_league(
-            league_info['name'],
-            league_info['country'],
-            league_info['code'],
-            league_info.get('api_id')
-        )
-        print(f"✓ {league_info['name']}")
+    # Insert leagues (one commit for all of them)
+    with db.transaction():
+        for league_key, league_info in LEAGUES.items():
+            league_id = db.insert_league(
+                league_info['name'],
+                league_info['country'],
+                league_info['code'],
+                league_info.get('api_id')
+            )
+            print(f"✓ {league_info['name']}")
     print("\n✓ Database initialized!")
 
 def download_data():
     """Download historical data"""
+    from scrapers.historical_downloader import HistoricalDataDownloader
+    
     print("Downloading historical match data...")
     downloader = HistoricalDataDownloader()
     all_data = downloader.download_all_leagues()
@@ -43,10 +66,16 @@ def download_data():
     for league_name, df in all_data.items():
         downloader.save_to_database(league_name, df)
     
+    downloader.db.refresh_league_standings()
+    downloader.db.refresh_team_recent_stats()
+    downloader.db.set_meta('last_update', datetime.now().isoformat())
+    
     print("\n✓ Data download complete!")
 
 def train_models():
     """Train prediction models"""
+    from models.train import MatchPredictor
+    
     print("Training prediction models...")
     predictor = MatchPredictor()
     results = predictor.train_all_leagues(save_models=True)
@@ -54,16 +83,15 @@ def train_models():
 
 def predict_matches(league: str = None, days: int = 7):
     """Predict upcoming matches"""
+    from prediction.predict import FootballPredictor
+    
     predictor = FootballPredictor()
     predictor.load_models()
     
     # Convert league name to key
     league_key = None
     if league:
-        for key, info in LEAGUES.items():
-            if info['name'].lower() == league.lower() or key == league.lower():
-                league_key = key
-                break
+        league_key = find_league(league)
         
         if not league_key:
             print(f"League '{league}' not found!")
@@ -82,23 +110,14 @@ def predict_matches(league: str = None, days: int = 7):
 
 def predict_specific_match(home_team: str, away_team: str, league: str):
     """Predict a specific match"""
+    from prediction.predict import FootballPredictor
+    
     predictor = FootballPredictor()
     predictor.load_models()
     
     # Find league
-    league_key = None
-    league_id = None
-    for key, info in LEAGUES.items():
-        if info['name'].lower() == league.lower() or key == league.lower():
-            league_key = key
-            # Get league ID
-            result = predictor.db.execute_query(
-                "SELECT league_id FROM leagues WHERE league_name = ?",
-                (info['name'],)
-            )
-            if result:
-                league_id = result[0][0]
-            break
+    league_key = find_league(league)
+    league_id = get_league_id(predictor.db, league_key) if league_key else None
     
     if not league_key or not league_id:
         print(f"League '{league}' not found!")
@@ -134,17 +153,8 @@ def list_teams(league: str):
     db = DatabaseManager()
     
     # Find league
-    league_id = None
-    league_name = None
-    for key, info in LEAGUES.items():
-        if info['name'].lower() == league.lower() or key == league.lower():
-            result = db.execute_query(
-                "SELECT league_id, league_name FROM leagues WHERE league_name = ?",
-                (info['name'],)
-            )
-            if result:
-                league_id, league_name = result[0]
-            break
+    league_key = find_league(league)
+    league_id = get_league_id(db, league_key) if league_key else None
     
     if not league_id:
         print(f"League '{league}' not found!")
@@ -156,43 +166,12 @@ def list_teams(league: str):
         (league_id,)
     )
     
-    print(f"\nTeams in {league_name}:")
+    print(f"\nTeams in {LEAGUES[league_key]['name']}:")
     print("="*50)
     for team in teams:
         print(f"  - {team[0]}")
     print(f"\nTotal: {len(teams)} teams")
 
-def show_status():
-    """Show system status"""
-    db = DatabaseManager()
-    
-    print("\n" + "="*70)
-    print("FOOTBALL PREDICTION SYSTEM - STATUS")
-    print("="*70)
-    
-    # Database stats
-    total_matches = db.execute_query("SELECT COUNT(*) FROM matches")[0][0]
-    total_teams = db.execute_query("SELECT COUNT(*) FROM teams")[0][0]
-    total_fixtures = db.execute_query("SELECT COUNT(*) FROM fixtures")[0][0]
-    
-    print(f"\nDatabase:")
-    print(f"  Matches: {total_matches}")
-    print(f"  Teams: {total_teams}")
-    print(f"  Fixtures: {total_fixtures}")
-    
-    # Models
-    print(f"\nTrained Models:")
-    from pathlib import Path
-    from config.config import MODELS_DIR
-    
-    for league_key, league_info in LEAGUES.items():
-        model_path = MODELS_DIR / f"{league_key}_model.pkl"
-        if model_path.exists():
-            print(f"  ✓ {league_info['name']}")
-        else:
-            print(f"  ✗ {league_info['name']} (not trained)")
-    print("="*70)
-
 def update_fixtures(days_ahead: int = 7):
     """Update upcoming fixtures and team news"""
     from scrapers.fixtures_scraper import AdvancedFixturesScraper
@@ -214,9 +193,9 @@ def show_status():
     print("="*70)
     
     # Database stats
-    total_matches = db.execute_query("SELECT COUNT(*) FROM matches")[0][0]
-    total_teams = db.execute_query("SELECT COUNT(*) FROM teams")[0][0]
-    total_fixtures = db.execute_query("SELECT COUNT(*) FROM fixtures")[0][0]
+    total_matches, total_teams, total_fixtures = db.execute_query(
+        "SELECT (SELECT COUNT(*) FROM matches), (SELECT COUNT(*) FROM teams), (SELECT COUNT(*) FROM fixtures)"
+    )[0]
     
     print(f"\nDatabase:")
     print(f"  Matches: {total_matches}")
@@ -225,11 +204,8 @@ def show_status():
     
     # Models
     print(f"\nTrained Models:")
-    from pathlib import Path
-    from config.config import MODELS_DIR
-    
     for league_key, league_info in LEAGUES.items():
-        model_path = MODELS_DIR / f"{league_key}_model.pkl"
+        model_path = MODELS_DIR / f"{league_key}_model.ubj"
         if model_path.exists():
             print(f"  ✓ {league_info['name']}")
         else:
@@ -298,6 +274,8 @@ Examples:
         parser.print_help()
         return
     
+    ensure_dirs()
+    
     try:
         if args.command == 'setup':
             setup_database()
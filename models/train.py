@@ -2,28 +2,40 @@
 Model Training for Football Match Prediction
 Trains XGBoost models for each league
 """
+import json
+import os
 import pandas as pd
 import numpy as np
-import pickle
 from pathlib import Path
+from joblib import Parallel, delayed
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, log_loss
+from sklearn.metrics import accuracy_score, confusion_matrix, log_loss
 import xgboost as xgb
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 import matplotlib.pyplot as plt
 
-from config.config import LEAGUES, MODELS_DIR, MODEL_PARAMS
+from config.config import LEAGUES, MODELS_DIR, MODEL_PARAMS, ensure_dirs
 from features.engineer import FeatureEngineer
 from utils.database import DatabaseManager
 
+# XGBoost threads per model when leagues are trained in parallel; a league's
+# dataset is too small for a fit to scale much further
+FIT_THREADS = 8
+
+# Result letter (as a byte) -> class (0=Away, 1=Draw, 2=Home), -1 for anything else
+RESULT_CLASSES = np.full(256, -1, dtype=np.int8)
+RESULT_CLASSES[[ord('A'), ord('D'), ord('H')]] = [0, 1, 2]
+
 class MatchPredictor:
     """Train and evaluate match prediction models"""
     
-    def __init__(self):
+    def __init__(self, n_threads: int = None):
         self.db = DatabaseManager()
         self.engineer = FeatureEngineer()
         self.models = {}
         self.feature_columns = None
+        # XGBoost threads per fit (None = XGBoost default, all cores)
+        self.n_threads = n_threads
         
     def prepare_data(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
         """
@@ -43,9 +55,9 @@ class MatchPredictor:
         
         X = df[self.feature_columns]
         
-        # Convert result to numeric (0=Away, 1=Draw, 2=Home)
-        result_mapping = {'A': 0, 'D': 1, 'H': 2}
-        y = df['result'].map(result_mapping)
+        # Convert result to numeric (0=Away, 1=Draw, 2=Home) with one table lookup
+        result_bytes = np.frombuffer(df['result'].to_numpy().astype('S1').tobytes(), dtype=np.uint8)
+        y = pd.Series(RESULT_CLASSES[result_bytes], index=df.index, name='result')
         
         # Handle missing values
         X = X.fillna(0)
@@ -66,7 +78,7 @@ class MatchPredictor:
         Returns:
             Trained XGBoost model
         """
-        model = xgb.XGBClassifier(**MODEL_PARAMS['xgboost'])
+        model = xgb.XGBClassifier(**MODEL_PARAMS['xgboost'], n_jobs=self.n_threads)
         
         if X_val is not None and y_val is not None:
             eval_set = [(X_train, y_train), (X_val, y_val)]
@@ -95,9 +107,9 @@ class MatchPredictor:
         Returns:
             Dictionary with evaluation metrics
         """
-        # Predictions
-        y_pred = model.predict(X_test)
+        # Predictions (the predicted class is the most probable one)
         y_pred_proba = model.predict_proba(X_test)
+        y_pred = y_pred_proba.argmax(axis=1)
         
         # Accuracy
         accuracy = accuracy_score(y_test, y_pred)
@@ -106,11 +118,11 @@ class MatchPredictor:
         logloss = log_loss(y_test, y_pred_proba)
         
         # Confusion matrix
-        cm = confusion_matrix(y_test, y_pred)
+        cm = confusion_matrix(y_test, y_pred, labels=[0, 1, 2])
         
         # Classification report
         target_names = ['Away Win', 'Draw', 'Home Win']
-        report = classification_report(y_test, y_pred, target_names=target_names, output_dict=True)
+        report = self._classification_report(cm, target_names)
         
         print(f"\n{'='*60}")
         print(f"Model Evaluation: {league_name}")
@@ -131,7 +143,7 @@ class MatchPredictor:
                   f"F1={report[outcome]['f1-score']:.3f}")
         
         # Analyze by match type (favorite vs underdog)
-        self._analyze_by_match_type(model, X_test, y_test)
+        self._analyze_by_match_type(X_test, y_test, y_pred)
         
         return {
             'accuracy': accuracy,
@@ -140,25 +152,67 @@ class MatchPredictor:
             'classification_report': report
         }
     
-    def _analyze_by_match_type(self, model: xgb.XGBClassifier,
-                                X_test: pd.DataFrame, y_test: pd.Series):
+    @staticmethod
+    def _classification_report(cm: np.ndarray, target_names: list) -> Dict:
+        """
+        Per-class precision/recall/F1 from a confusion matrix
+        
+        Same layout and plain floats as sklearn's
+        classification_report(output_dict=True), without scanning the
+        predictions again (0 where a class has no predictions or no matches,
+        as sklearn reports)
+        
+        Args:
+            cm: Confusion matrix (rows actual, columns predicted)
+            target_names: Class names in label order
+        
+        Returns:
+            Dictionary keyed by class name, plus accuracy and averages
+        """
+        correct = np.diag(cm).astype(float)
+        support = cm.sum(axis=1)
+        predicted = cm.sum(axis=0)
+        
+        precision = np.divide(correct, predicted, out=np.zeros_like(correct), where=predicted > 0)
+        recall = np.divide(correct, support, out=np.zeros_like(correct), where=support > 0)
+        both = precision + recall
+        f1 = np.divide(2 * precision * recall, both, out=np.zeros_like(correct), where=both > 0)
+        
+        report = {
+            name: {'precision': float(precision[i]), 'recall': float(recall[i]),
+                   'f1-score': float(f1[i]), 'support': float(support[i])}
+            for i, name in enumerate(target_names)
+        }
+        report['accuracy'] = float(correct.sum() / support.sum())
+        for avg_name, weights in (('macro avg', None), ('weighted avg', support)):
+            report[avg_name] = {
+                'precision': float(np.average(precision, weights=weights)),
+                'recall': float(np.average(recall, weights=weights)),
+                'f1-score': float(np.average(f1, weights=weights)),
+                'support': float(support.sum())
+            }
+        
+        return report
+    
+    def _analyze_by_match_type(self, X_test: pd.DataFrame, y_test: pd.Series,
+                                y_pred: np.ndarray):
         """Analyze accuracy by match type (clear favorite, even match, etc.)"""
         if 'position_diff' not in X_test.columns:
             return
         
-        position_diff = X_test['position_diff'].values
-        y_pred = model.predict(X_test)
+        position_gap = np.abs(X_test['position_diff'].to_numpy())
+        correct = y_pred == y_test.to_numpy()
         
         # Clear favorite: position difference > 5
-        clear_favorite_mask = np.abs(position_diff) > 5
-        if clear_favorite_mask.sum() > 0:
-            acc = accuracy_score(y_test[clear_favorite_mask], y_pred[clear_favorite_mask])
+        clear_favorite_mask = position_gap > 5
+        if clear_favorite_mask.any():
+            acc = correct[clear_favorite_mask].mean()
             print(f"\nClear Favorite matches (pos diff > 5): {acc:.4f} ({acc*100:.2f}%)")
         
         # Even matches: position difference <= 3
-        even_match_mask = np.abs(position_diff) <= 3
-        if even_match_mask.sum() > 0:
-            acc = accuracy_score(y_test[even_match_mask], y_pred[even_match_mask])
+        even_match_mask = position_gap <= 3
+        if even_match_mask.any():
+            acc = correct[even_match_mask].mean()
             print(f"Even matches (pos diff <= 3):          {acc:.4f} ({acc*100:.2f}%)")
     
     def get_feature_importance(self, model: xgb.XGBClassifier, top_n: int = 15) -> pd.DataFrame:
@@ -172,19 +226,19 @@ class MatchPredictor:
         Returns:
             DataFrame with feature importance
         """
-        importance_df = pd.DataFrame({
-            'feature': self.feature_columns,
-            'importance': model.feature_importances_
-        })
+        importances = model.feature_importances_
         
-        importance_df = importance_df.sort_values('importance', ascending=False).head(top_n)
+        # Select the top_n without sorting every feature, then order just those
+        top = np.argpartition(importances, -min(top_n, len(importances)))[-top_n:]
+        top = top[np.argsort(-importances[top], kind='stable')]
+        features = [self.feature_columns[i] for i in top]
         
         print(f"\nTop {top_n} Most Important Features:")
         print("="*50)
-        for idx, row in importance_df.iterrows():
-            print(f"{row['feature']:35s}: {row['importance']:.4f}")
+        for feature, importance in zip(features, importances[top]):
+            print(f"{feature:35s}: {importance:.4f}")
         
-        return importance_df
+        return pd.DataFrame({'feature': features, 'importance': importances[top]}, index=top)
     
     def train_league_model(self, league_name: str, 
                           test_size: float = 0.2,
@@ -230,10 +284,10 @@ class MatchPredictor:
         X, y = self.prepare_data(df)
         
         # Time-based split (important for time series data!)
-        # Sort by date first
-        df_sorted = df.sort_values('date').reset_index(drop=True)
-        X_sorted = X.iloc[df_sorted.index]
-        y_sorted = y.iloc[df_sorted.index]
+        # Order rows by date; stable, so same-day matches keep their order
+        order = np.argsort(df['date'].to_numpy(), kind='stable')
+        X_sorted = X.iloc[order]
+        y_sorted = y.iloc[order]
         
         # Split: 70% train, 10% validation, 20% test
         train_size = int(len(X_sorted) * (1 - test_size - val_size))
@@ -274,32 +328,24 @@ class MatchPredictor:
         """
         Train models for all leagues
         
+        Leagues are independent, so with enough cores they are trained in
+        parallel worker processes, each fit capped at FIT_THREADS threads.
+        
         Args:
             save_models: Whether to save trained models to disk
         
         Returns:
             Dictionary of league_name -> model results
         """
-        results = {}
-        
-        for league_key, league_info in LEAGUES.items():
-            league_name = league_info['name']
-            
-            result = self.train_league_model(league_name)
-            
-            if result:
-                results[league_name] = result
-                
-                if save_models:
-                    # Save model
-                    model_path = MODELS_DIR / f"{league_key}_model.pkl"
-                    with open(model_path, 'wb') as f:
-                        pickle.dump({
-                            'model': result['model'],
-                            'feature_columns': result['feature_columns'],
-                            'metrics': result['metrics']
-                        }, f)
-                    print(f"\n✓ Model saved to {model_path}")
+        cores = os.cpu_count() or 1
+        n_jobs = max(1, min(len(LEAGUES), cores // FIT_THREADS))
+        n_threads = FIT_THREADS if n_jobs > 1 else self.n_threads
+        
+        trained = Parallel(n_jobs=n_jobs)(
+            delayed(_train_league)(league_key, save_models, n_threads)
+            for league_key in LEAGUES
+        )
+        results = {league_name: result for league_name, result in trained if result}
         
         # Print summary
         print(f"\n{'='*70}")
@@ -311,6 +357,23 @@ class MatchPredictor:
         
         return results
     
+    def save_model(self, league_key: str, result: Dict):
+        """
+        Save a trained model to disk
+        
+        Args:
+            league_key: League key (e.g., 'premier_league')
+            result: Result from train_league_model()
+        """
+        # XGBoost's own format for the trees, a JSON file for the rest
+        model_path = MODELS_DIR / f"{league_key}_model.ubj"
+        result['model'].save_model(model_path)
+        
+        metrics = dict(result['metrics'], confusion_matrix=result['metrics']['confusion_matrix'].tolist())
+        with open(MODELS_DIR / f"{league_key}_model.json", 'w') as f:
+            json.dump({'feature_columns': result['feature_columns'], 'metrics': metrics}, f)
+        print(f"\n✓ Model saved to {model_path}")
+    
     def load_model(self, league_key: str) -> Dict:
         """
         Load a trained model from disk
@@ -321,22 +384,38 @@ class MatchPredictor:
         Returns:
             Dictionary with model and metadata
         """
-        model_path = MODELS_DIR / f"{league_key}_model.pkl"
+        model_path = MODELS_DIR / f"{league_key}_model.ubj"
         
         if not model_path.exists():
             raise FileNotFoundError(f"Model not found: {model_path}")
         
-        with open(model_path, 'rb') as f:
-            model_data = pickle.load(f)
+        with open(MODELS_DIR / f"{league_key}_model.json") as f:
+            model_data = json.load(f)
+        
+        model_data['model'] = xgb.XGBClassifier()
+        model_data['model'].load_model(model_path)
         
         return model_data
 
+def _train_league(league_key: str, save_models: bool,
+                  n_threads: int = None) -> Tuple[str, Optional[Dict]]:
+    """Train (and optionally save) one league's model - a train_all_leagues() job"""
+    predictor = MatchPredictor(n_threads=n_threads)
+    league_name = LEAGUES[league_key]['name']
+    
+    result = predictor.train_league_model(league_name)
+    if result and save_models:
+        predictor.save_model(league_key, result)
+    
+    return league_name, result
+
 def main():
     """Train models for all leagues"""
     print("="*70)
     print("FOOTBALL PREDICTION SYSTEM - MODEL TRAINING")
     print("="*70)
     
+    ensure_dirs()
     predictor = MatchPredictor()
     results = predictor.train_all_leagues(save_models=True)
     
@@ -45,7 +45,7 @@ git add data/raw/*.csv
 
 # Add models if retrained
 if ($retrain -eq 'y') {
-    git add models/*.pkl
+    git add -f models/*_model.ubj models/*_model.json
 }
 
 # Check if there are changes
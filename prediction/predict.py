@@ -4,10 +4,10 @@ Main module for making predictions on matches
 """
 import pandas as pd
 import numpy as np
-import pickle
+import json
+import xgboost as xgb
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
-import shap
 
 from config.config import LEAGUES, MODELS_DIR, HIGH_CONFIDENCE_THRESHOLD, MEDIUM_CONFIDENCE_THRESHOLD
 from features.engineer import FeatureEngineer
@@ -22,17 +22,26 @@ class FootballPredictor:
         self.models = {}
         self.feature_columns = {}
         self.explainers = {}
+        # team_id -> team name and league_id -> league key; teams and leagues
+        # don't change during a prediction run
+        self._team_names = {}
+        self._league_keys = None
         
     def load_models(self):
         """Load all trained models"""
         print("Loading models...")
+        # Every fixture needs its team names; load them all in one query
+        self._team_names.update(self.db.execute_query("SELECT team_id, team_name FROM teams"))
+        
         for league_key in LEAGUES.keys():
             try:
-                model_path = MODELS_DIR / f"{league_key}_model.pkl"
-                with open(model_path, 'rb') as f:
-                    model_data = pickle.load(f)
+                with open(MODELS_DIR / f"{league_key}_model.json") as f:
+                    model_data = json.load(f)
+                
+                model = xgb.XGBClassifier()
+                model.load_model(MODELS_DIR / f"{league_key}_model.ubj")
                 
-                self.models[league_key] = model_data['model']
+                self.models[league_key] = model
                 self.feature_columns[league_key] = model_data['feature_columns']
                 print(f"✓ Loaded {LEAGUES[league_key]['name']} model")
                 
@@ -43,29 +52,31 @@ class FootballPredictor:
     
     def get_team_name(self, team_id: int) -> str:
         """Get team name from ID"""
-        result = self.db.execute_query(
-            "SELECT team_name FROM teams WHERE team_id = ?",
-            (team_id,)
-        )
-        return result[0][0] if result else f"Team {team_id}"
+        return self.get_team_names(team_id)[0]
+    
+    def get_team_names(self, *team_ids: int) -> List[str]:
+        """Get names for several team IDs (one query for any not seen yet)"""
+        missing = [team_id for team_id in team_ids if team_id not in self._team_names]
+        if missing:
+            placeholders = ', '.join('?' * len(missing))
+            self._team_names.update(self.db.execute_query(
+                f"SELECT team_id, team_name FROM teams WHERE team_id IN ({placeholders})",
+                missing
+            ))
+        return [self._team_names.get(team_id, f"Team {team_id}") for team_id in team_ids]
     
     def get_league_key(self, league_id: int) -> str:
         """Get league key from league ID"""
-        result = self.db.execute_query(
-            "SELECT league_name FROM leagues WHERE league_id = ?",
-            (league_id,)
-        )
-        
-        if not result:
-            return None
-        
-        league_name = result[0][0]
-        
-        for key, info in LEAGUES.items():
-            if info['name'] == league_name:
-                return key
+        if self._league_keys is None:
+            keys_by_name = {info['name']: key for key, info in LEAGUES.items()}
+            self._league_keys = {
+                db_league_id: keys_by_name.get(league_name)
+                for db_league_id, league_name in self.db.execute_query(
+                    "SELECT league_id, league_name FROM leagues"
+                )
+            }
         
-        return None
+        return self._league_keys.get(league_id)
     
     def predict_match(self, home_team_id: int, away_team_id: int,
                      league_id: int, date: str = None) -> Dict:
@@ -93,8 +104,7 @@ class FootballPredictor:
             }
         
         # Get team names
-        home_team = self.get_team_name(home_team_id)
-        away_team = self.get_team_name(away_team_id)
+        home_team, away_team = self.get_team_names(home_team_id, away_team_id)
         
         # Calculate features
         try:
@@ -108,16 +118,38 @@ class FootballPredictor:
                 'away_team': away_team
             }
         
-        # Prepare features for model
-        X = pd.DataFrame([features])
-        X = X[self.feature_columns[league_key]]
-        X = X.fillna(0)
+        probabilities, predicted_classes = self._predict_rows(league_key, [features])
+        
+        return self._build_prediction(
+            league_key, home_team, away_team, date, features,
+            probabilities[0], predicted_classes[0]
+        )
+    
+    def _predict_rows(self, league_key: str, features_list: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Run a league's model on several matches in one call
         
-        # Make prediction
-        model = self.models[league_key]
-        probabilities = model.predict_proba(X)[0]
-        predicted_class = model.predict(X)[0]
+        Args:
+            league_key: League key (model to use)
+            features_list: Match features, one dict per match
         
+        Returns:
+            Tuple of (probabilities, predicted classes), one row per match
+        """
+        # Prepare features for model (one row per match in the model's column
+        # order); a plain array skips building a DataFrame, None/NaN become 0
+        columns = self.feature_columns[league_key]
+        X = np.array([[features[col] for col in columns] for features in features_list], dtype=np.float32)
+        X[np.isnan(X)] = 0
+        
+        # Make prediction (the predicted class is the most probable one)
+        probabilities = self.models[league_key].predict_proba(X)
+        return probabilities, probabilities.argmax(axis=1)
+    
+    def _build_prediction(self, league_key: str, home_team: str, away_team: str,
+                          date: str, features: Dict, probabilities: np.ndarray,
+                          predicted_class: int) -> Dict:
+        """Assemble the prediction result for one match from the model output"""
         # Map to outcomes
         outcomes = ['Away Win', 'Draw', 'Home Win']
         predicted_outcome = outcomes[predicted_class]
@@ -265,8 +297,10 @@ class FootballPredictor:
         Returns:
             List of predictions
         """
-        # Get upcoming fixtures
-        end_date = (datetime.now() + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
+        # Get upcoming fixtures (fixtures are never marked played, so skip past dates)
+        today = datetime.now()
+        start_date = today.strftime('%Y-%m-%d')
+        end_date = (today + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
         
         query = """
             SELECT f.fixture_id, f.league_id, f.date, 
@@ -274,29 +308,59 @@ class FootballPredictor:
                    l.league_name
             FROM fixtures f
             JOIN leagues l ON f.league_id = l.league_id
-            WHERE f.date <= ? AND f.status = 'scheduled'
-            ORDER BY f.date
+            WHERE f.date >= ? AND f.date <= ? AND f.status = 'scheduled'
         """
+        params = [start_date, end_date]
         
-        fixtures = self.db.execute_query(query, (end_date,))
+        # Filter by league if specified
+        if league_key:
+            query += " AND l.league_name = ?"
+            params.append(LEAGUES[league_key]['name'])
         
-        predictions = []
+        fixtures = self.db.execute_query(query + " ORDER BY f.date", params)
+        
+        # Features for every fixture first, so each league's model runs once
+        # on all of its fixtures instead of once per fixture
+        pending = []
+        by_league = {}
         
         for fixture in fixtures:
             fixture_id, league_id, date, home_team_id, away_team_id, league_name = fixture
             
-            # Filter by league if specified
-            if league_key:
-                league_key_db = self.get_league_key(league_id)
-                if league_key_db != league_key:
-                    continue
+            fixture_league_key = self.get_league_key(league_id)
+            
+            # Fixtures predict_match() would return an error for are skipped
+            if not fixture_league_key or fixture_league_key not in self.models:
+                continue
             
-            # Make prediction
-            prediction = self.predict_match(home_team_id, away_team_id, league_id, date)
+            home_team, away_team = self.get_team_names(home_team_id, away_team_id)
             
-            if 'error' not in prediction:
+            try:
+                features = self.engineer.get_match_features(
+                    home_team_id, away_team_id, league_id, date
+                )
+            except Exception:
+                continue
+            
+            by_league.setdefault(fixture_league_key, []).append(len(pending))
+            pending.append((fixture_id, fixture_league_key, date, home_team, away_team, features))
+        
+        predictions = [None] * len(pending)
+        
+        for fixture_league_key, indices in by_league.items():
+            probabilities, predicted_classes = self._predict_rows(
+                fixture_league_key, [pending[i][5] for i in indices]
+            )
+            
+            for i, match_probabilities, predicted_class in zip(indices, probabilities, predicted_classes):
+                fixture_id, _, date, home_team, away_team, features = pending[i]
+                
+                prediction = self._build_prediction(
+                    fixture_league_key, home_team, away_team, date, features,
+                    match_probabilities, predicted_class
+                )
                 prediction['fixture_id'] = fixture_id
-                predictions.append(prediction)
+                predictions[i] = prediction
         
         return predictions
     
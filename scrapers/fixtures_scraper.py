@@ -10,7 +10,7 @@ import json
 import time
 
 from utils.database import DatabaseManager
-from config.config import LEAGUES, API_FOOTBALL_KEY, API_FOOTBALL_BASE_URL
+from config.config import LEAGUES, API_FOOTBALL_KEY, API_FOOTBALL_BASE_URL, ensure_dirs
 
 class AdvancedFixturesScraper:
     """Scrapes upcoming fixtures with comprehensive team data"""
@@ -288,48 +288,49 @@ class AdvancedFixturesScraper:
         """Save fetched fixtures to database"""
         saved_count = 0
         
-        for fixture in fixtures:
-            try:
-                # Get league ID
-                league_key = fixture['league_key']
-                league_name = LEAGUES[league_key]['name']
-                
-                league_result = self.db.execute_query(
-                    "SELECT league_id FROM leagues WHERE league_name = ?",
-                    (league_name,)
-                )
-                
-                if not league_result:
-                    continue
-                
-                league_id = league_result[0][0]
-                
-                # Get or create team IDs
-                home_team_id = self.db.insert_team(fixture['home_team'], league_id)
-                away_team_id = self.db.insert_team(fixture['away_team'], league_id)
-                
-                # Insert fixture
-                query = """
-                    INSERT OR REPLACE INTO fixtures 
-                    (league_id, date, home_team_id, away_team_id, status, venue, last_updated)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """
-                
-                self.db.execute_update(query, (
-                    league_id,
-                    fixture['date'],
-                    home_team_id,
-                    away_team_id,
-                    fixture.get('status', 'scheduled'),
-                    fixture.get('venue', ''),
-                    datetime.now().isoformat()
-                ))
-                
-                saved_count += 1
-                
-            except Exception as e:
-                print(f"Error saving fixture: {e}")
-        
+        with self.db.transaction():
+            for fixture in fixtures:
+                try:
+                    # Get league ID
+                    league_key = fixture['league_key']
+                    league_name = LEAGUES[league_key]['name']
+                    
+                    league_result = self.db.execute_query(
+                        "SELECT league_id FROM leagues WHERE league_name = ?",
+                        (league_name,)
+                    )
+                    
+                    if not league_result:
+                        continue
+                    
+                    league_id = league_result[0][0]
+                    
+                    # Get or create team IDs
+                    home_team_id = self.db.insert_team(fixture['home_team'], league_id)
+                    away_team_id = self.db.insert_team(fixture['away_team'], league_id)
+                    
+                    # Insert fixture
+                    query = """
+                        INSERT OR REPLACE INTO fixtures 
+                        (league_id, date, home_team_id, away_team_id, status, venue, last_updated)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """
+                    
+                    self.db.execute_update(query, (
+                        league_id,
+                        fixture['date'],
+                        home_team_id,
+                        away_team_id,
+                        fixture.get('status', 'scheduled'),
+                        fixture.get('venue', ''),
+                        datetime.now().isoformat()
+                    ))
+                    
+                    saved_count += 1
+                    
+                except Exception as e:
+                    print(f"Error saving fixture: {e}")
+            
         print(f"\n✓ Saved {saved_count} fixtures to database")
         return saved_count
     
@@ -392,6 +393,7 @@ class AdvancedFixturesScraper:
 
 def main():
     """Update fixtures from command line"""
+    ensure_dirs()
     scraper = AdvancedFixturesScraper()
     scraper.update_all_fixtures(days_ahead=7)
 
@@ -6,7 +6,8 @@ import pandas as pd
 from pathlib import Path
 from typing import Dict, List
 import time
-from config.config import LEAGUES, RAW_DATA_DIR, FOOTBALL_DATA_UK_BASE_URL
+from concurrent.futures import ThreadPoolExecutor
+from config.config import LEAGUES, RAW_DATA_DIR, FOOTBALL_DATA_UK_BASE_URL, ensure_dirs
 from utils.database import DatabaseManager
 
 class HistoricalDataDownloader:
@@ -49,43 +50,72 @@ class HistoricalDataDownloader:
             print(f"✗ Error downloading {league_code} {season_code}: {e}")
             return pd.DataFrame()
     
-    def download_all_leagues(self, seasons: List[str] = None) -> Dict[str, pd.DataFrame]:
+    def download_league(self, league_key: str, seasons: List[str] = None) -> pd.DataFrame:
+        """
+        Download all seasons of one league and save them to CSV
+        
+        Args:
+            league_key: League key (e.g., 'premier_league')
+            seasons: List of season years (defaults to the league's configured seasons)
+        
+        Returns:
+            DataFrame with all downloaded seasons (empty if nothing was downloaded)
+        """
+        league_info = LEAGUES[league_key]
+        league_name = league_info['name']
+        league_code = league_info['code']
+        league_seasons = seasons or league_info.get('seasons', [])
+        
+        print(f"\n{'='*60}")
+        print(f"Downloading {league_name}")
+        print(f"{'='*60}")
+        
+        league_data = []
+        
+        for season in league_seasons:
+            df = self.download_league_season(league_code, season)
+            if not df.empty:
+                league_data.append(df)
+            time.sleep(1)  # Be nice to the server
+        
+        if not league_data:
+            return pd.DataFrame()
+        
+        combined_df = pd.concat(league_data, ignore_index=True)
+        
+        # Save to CSV
+        output_path = RAW_DATA_DIR / f"{league_key}_raw.csv"
+        combined_df.to_csv(output_path, index=False)
+        print(f"\n✓ Saved {len(combined_df)} matches to {output_path}")
+        
+        return combined_df
+    
+    def download_all_leagues(self, seasons: List[str] = None,
+                             max_workers: int = 4) -> Dict[str, pd.DataFrame]:
         """
         Download all configured leagues for specified seasons
         
+        Leagues are downloaded concurrently (network-bound); the seasons of
+        each league are still fetched one at a time.
+        
         Args:
             seasons: List of season years (e.g., ['2021', '2022', '2023'])
+            max_workers: Number of leagues to download at once
         
         Returns:
             Dictionary of league_name -> DataFrame
         """
         all_data = {}
         
-        for league_key, league_info in LEAGUES.items():
-            league_name = league_info['name']
-            league_code = league_info['code']
-            league_seasons = seasons or league_info.get('seasons', [])
-            
-            print(f"\n{'='*60}")
-            print(f"Downloading {league_name}")
-            print(f"{'='*60}")
-            
-            league_data = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda league_key: self.download_league(league_key, seasons),
+                LEAGUES.keys()
+            )
             
-            for season in league_seasons:
-                df = self.download_league_season(league_code, season)
+            for league_info, df in zip(LEAGUES.values(), results):
                 if not df.empty:
-                    league_data.append(df)
-                time.sleep(1)  # Be nice to the server
-            
-            if league_data:
-                combined_df = pd.concat(league_data, ignore_index=True)
-                all_data[league_name] = combined_df
-                
-                # Save to CSV
-                output_path = RAW_DATA_DIR / f"{league_key}_raw.csv"
-                combined_df.to_csv(output_path, index=False)
-                print(f"\n✓ Saved {len(combined_df)} matches to {output_path}")
+                    all_data[league_info['name']] = df
             
         return all_data
     
@@ -158,96 +188,98 @@ class HistoricalDataDownloader:
         matches_added = 0
         matches_skipped = 0
         
-        for _, row in df.iterrows():
-            try:
-                # Get or create teams
-                home_team = row['HomeTeam']
-                away_team = row['AwayTeam']
-                
-                home_team_id = self.db.insert_team(home_team, league_id)
-                away_team_id = self.db.insert_team(away_team, league_id)
-                
-                # Convert date format (DD/MM/YYYY to YYYY-MM-DD)
-                date_str = row['Date']
-                if '/' in date_str:
-                    parts = date_str.split('/')
-                    if len(parts[2]) == 2:  # Two-digit year
-                        year = '20' + parts[2]
+        # One commit for the whole league instead of one per team/match insert
+        with self.db.transaction():
+            for _, row in df.iterrows():
+                try:
+                    # Get or create teams
+                    home_team = row['HomeTeam']
+                    away_team = row['AwayTeam']
+                    
+                    home_team_id = self.db.insert_team(home_team, league_id)
+                    away_team_id = self.db.insert_team(away_team, league_id)
+                    
+                    # Convert date format (DD/MM/YYYY to YYYY-MM-DD)
+                    date_str = row['Date']
+                    if '/' in date_str:
+                        parts = date_str.split('/')
+                        if len(parts[2]) == 2:  # Two-digit year
+                            year = '20' + parts[2]
+                        else:
+                            year = parts[2]
+                        date_formatted = f"{year}-{parts[1].zfill(2)}-{parts[0].zfill(2)}"
                     else:
-                        year = parts[2]
-                    date_formatted = f"{year}-{parts[1].zfill(2)}-{parts[0].zfill(2)}"
-                else:
-                    date_formatted = date_str
-                
-                # Insert match
-                match_query = """
-                    INSERT OR IGNORE INTO matches 
-                    (league_id, season, date, home_team_id, away_team_id, 
-                     home_goals, away_goals, result,
-                     home_shots, away_shots, home_shots_on_target, away_shots_on_target,
-                     home_corners, away_corners, home_fouls, away_fouls,
-                     home_yellow, away_yellow, home_red, away_red)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
-                
-                self.db.execute_update(match_query, (
-                    league_id,
-                    row.get('Season', ''),
-                    date_formatted,
-                    home_team_id,
-                    away_team_id,
-                    int(row.get('HomeGoals', 0)),
-                    int(row.get('AwayGoals', 0)),
-                    row.get('Result', ''),
-                    int(row.get('HomeShots', 0)) if pd.notna(row.get('HomeShots')) else None,
-                    int(row.get('AwayShots', 0)) if pd.notna(row.get('AwayShots')) else None,
-                    int(row.get('HomeShotsTarget', 0)) if pd.notna(row.get('HomeShotsTarget')) else None,
-                    int(row.get('AwayShotsTarget', 0)) if pd.notna(row.get('AwayShotsTarget')) else None,
-                    int(row.get('HomeCorners', 0)) if pd.notna(row.get('HomeCorners')) else None,
-                    int(row.get('AwayCorners', 0)) if pd.notna(row.get('AwayCorners')) else None,
-                    int(row.get('HomeFouls', 0)) if pd.notna(row.get('HomeFouls')) else None,
-                    int(row.get('AwayFouls', 0)) if pd.notna(row.get('AwayFouls')) else None,
-                    int(row.get('HomeYellow', 0)) if pd.notna(row.get('HomeYellow')) else None,
-                    int(row.get('AwayYellow', 0)) if pd.notna(row.get('AwayYellow')) else None,
-                    int(row.get('HomeRed', 0)) if pd.notna(row.get('HomeRed')) else None,
-                    int(row.get('AwayRed', 0)) if pd.notna(row.get('AwayRed')) else None,
-                ))
-                
-                # Insert odds if available
-                if 'B365_Home' in row and pd.notna(row['B365_Home']):
-                    # Get match_id
-                    match_id_query = """
-                        SELECT match_id FROM matches 
-                        WHERE league_id = ? AND date = ? 
-                        AND home_team_id = ? AND away_team_id = ?
+                        date_formatted = date_str
+                    
+                    # Insert match
+                    match_query = """
+                        INSERT OR IGNORE INTO matches 
+                        (league_id, season, date, home_team_id, away_team_id, 
+                         home_goals, away_goals, result,
+                         home_shots, away_shots, home_shots_on_target, away_shots_on_target,
+                         home_corners, away_corners, home_fouls, away_fouls,
+                         home_yellow, away_yellow, home_red, away_red)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """
-                    match_result = self.db.execute_query(
-                        match_id_query, 
-                        (league_id, date_formatted, home_team_id, away_team_id)
-                    )
                     
-                    if match_result:
-                        match_id = match_result[0][0]
-                        odds_query = """
-                            INSERT OR IGNORE INTO odds 
-                            (match_id, bookmaker, home_odds, draw_odds, away_odds)
-                            VALUES (?, ?, ?, ?, ?)
+                    self.db.execute_update(match_query, (
+                        league_id,
+                        row.get('Season', ''),
+                        date_formatted,
+                        home_team_id,
+                        away_team_id,
+                        int(row.get('HomeGoals', 0)),
+                        int(row.get('AwayGoals', 0)),
+                        row.get('Result', ''),
+                        int(row.get('HomeShots', 0)) if pd.notna(row.get('HomeShots')) else None,
+                        int(row.get('AwayShots', 0)) if pd.notna(row.get('AwayShots')) else None,
+                        int(row.get('HomeShotsTarget', 0)) if pd.notna(row.get('HomeShotsTarget')) else None,
+                        int(row.get('AwayShotsTarget', 0)) if pd.notna(row.get('AwayShotsTarget')) else None,
+                        int(row.get('HomeCorners', 0)) if pd.notna(row.get('HomeCorners')) else None,
+                        int(row.get('AwayCorners', 0)) if pd.notna(row.get('AwayCorners')) else None,
+                        int(row.get('HomeFouls', 0)) if pd.notna(row.get('HomeFouls')) else None,
+                        int(row.get('AwayFouls', 0)) if pd.notna(row.get('AwayFouls')) else None,
+                        int(row.get('HomeYellow', 0)) if pd.notna(row.get('HomeYellow')) else None,
+                        int(row.get('AwayYellow', 0)) if pd.notna(row.get('AwayYellow')) else None,
+                        int(row.get('HomeRed', 0)) if pd.notna(row.get('HomeRed')) else None,
+                        int(row.get('AwayRed', 0)) if pd.notna(row.get('AwayRed')) else None,
+                    ))
+                    
+                    # Insert odds if available
+                    if 'B365_Home' in row and pd.notna(row['B365_Home']):
+                        # Get match_id
+                        match_id_query = """
+                            SELECT match_id FROM matches 
+                            WHERE league_id = ? AND date = ? 
+                            AND home_team_id = ? AND away_team_id = ?
                         """
-                        self.db.execute_update(odds_query, (
-                            match_id,
-                            'Bet365',
-                            float(row['B365_Home']),
-                            float(row['B365_Draw']),
-                            float(row['B365_Away'])
-                        ))
-                
-                matches_added += 1
-                
-            except Exception as e:
-                matches_skipped += 1
-                if matches_skipped <= 5:  # Only print first few errors
-                    print(f"Error processing match: {e}")
-        
+                        match_result = self.db.execute_query(
+                            match_id_query, 
+                            (league_id, date_formatted, home_team_id, away_team_id)
+                        )
+                        
+                        if match_result:
+                            match_id = match_result[0][0]
+                            odds_query = """
+                                INSERT OR IGNORE INTO odds 
+                                (match_id, bookmaker, home_odds, draw_odds, away_odds)
+                                VALUES (?, ?, ?, ?, ?)
+                            """
+                            self.db.execute_update(odds_query, (
+                                match_id,
+                                'Bet365',
+                                float(row['B365_Home']),
+                                float(row['B365_Draw']),
+                                float(row['B365_Away'])
+                            ))
+                    
+                    matches_added += 1
+                    
+                except Exception as e:
+                    matches_skipped += 1
+                    if matches_skipped <= 5:  # Only print first few errors
+                        print(f"Error processing match: {e}")
+            
         print(f"\n✓ Database update complete:")
         print(f"  - Matches added: {matches_added}")
         print(f"  - Matches skipped: {matches_skipped}")
@@ -258,6 +290,7 @@ def main():
     print("FOOTBALL PREDICTION SYSTEM - HISTORICAL DATA DOWNLOADER")
     print("="*70)
     
+    ensure_dirs()
     downloader = HistoricalDataDownloader()
     
     # Download all leagues
@@ -270,14 +303,18 @@ def main():
         print(f"\nProcessing {league_name}...")
         downloader.save_to_database(league_name, df)
     
+    downloader.db.refresh_league_standings()
+    downloader.db.refresh_team_recent_stats()
+    
     print("\n" + "="*70)
     print("✓ Historical data download complete!")
     print("="*70)
     
     # Print summary
     db = DatabaseManager()
-    total_matches = db.execute_query("SELECT COUNT(*) FROM matches")[0][0]
-    total_teams = db.execute_query("SELECT COUNT(*) FROM teams")[0][0]
+    total_matches, total_teams = db.execute_query(
+        "SELECT (SELECT COUNT(*) FROM matches), (SELECT COUNT(*) FROM teams)"
+    )[0]
     
     print(f"\nDatabase Summary:")
     print(f"  - Total matches: {total_matches}")
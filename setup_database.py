@@ -127,6 +127,15 @@ def setup_database():
         )
     """)
     
+    # Create meta table (app state shared across sessions, e.g. last update time)
+    print("Creating meta table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+    
     # Create indexes for better performance
     print("Creating indexes...")
     cursor.execute("""
@@ -135,8 +144,38 @@ def setup_database():
     """)
     
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_matches_teams 
-        ON matches(home_team_id, away_team_id)
+        CREATE INDEX IF NOT EXISTS idx_matches_h2h 
+        ON matches(home_team_id, away_team_id, date DESC)
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_matches_home_date 
+        ON matches(home_team_id, date DESC)
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_matches_away_date 
+        ON matches(away_team_id, date DESC)
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_matches_league_date 
+        ON matches(league_id, date)
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_matches_league_home 
+        ON matches(league_id, home_team_id)
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_matches_league_away 
+        ON matches(league_id, away_team_id)
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_teams_league 
+        ON teams(league_id, team_name)
     """)
     
     cursor.execute("""
@@ -144,6 +183,13 @@ def setup_database():
         ON fixtures(date)
     """)
     
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_injuries_team_status 
+        ON team_injuries(team_id, status)
+    """)
+    
+    cursor.execute("ANALYZE")
+    
     # Insert default leagues
     print("\nInserting default leagues...")
     leagues = [
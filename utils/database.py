@@ -2,28 +2,76 @@
 Database setup and utility functions
 """
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 import pandas as pd
-from config.config import DB_PATH
+from config.config import DB_PATH, RECENT_STATS_MATCHES
 
 class DatabaseManager:
     """Manages all database operations"""
     
     def __init__(self, db_path: Path = DB_PATH):
         self.db_path = db_path
-        self.connection = None
+        # sqlite3 connections can't be shared across threads, so each
+        # thread (Streamlit sessions, background updates) gets its own
+        self._local = threading.local()
+    
+    @property
+    def connection(self) -> Optional[sqlite3.Connection]:
+        """This thread's open connection, if any"""
+        return getattr(self._local, 'connection', None)
         
     def connect(self):
-        """Create database connection"""
-        self.connection = sqlite3.connect(self.db_path)
+        """Get this thread's database connection, opening it on first use"""
+        if self.connection is None:
+            conn = sqlite3.connect(self.db_path)
+            # WAL lets readers proceed while a writer (e.g. an update) is active
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            # Tuned for read-heavy use: bigger page cache (~20MB), in-memory
+            # temp tables for sorts/GROUP BY, and memory-mapped reads
+            conn.execute("PRAGMA cache_size = -20000")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            conn.execute("PRAGMA mmap_size = 268435456")
+            self._local.connection = conn
         return self.connection
     
     def close(self):
-        """Close database connection"""
+        """Close this thread's database connection"""
         if self.connection:
             self.connection.close()
+            self._local.connection = None
             
+    @contextmanager
+    def transaction(self):
+        """
+        Group writes into a single commit
+        
+        insert_league(), insert_team(), execute_update() and set_meta() calls
+        inside the block don't commit on their own; everything is committed
+        when the block exits (or rolled back if it raises).
+        """
+        conn = self.connect()
+        self._local.in_transaction = True
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._local.in_transaction = False
+    
+    @contextmanager
+    def _writing(self):
+        """This thread's connection for a write, committed afterwards unless inside transaction()"""
+        conn = self.connect()
+        if getattr(self._local, 'in_transaction', False):
+            yield conn
+        else:
+            with conn:
+                yield conn
+    
     def __enter__(self):
         self.connect()
         return self
@@ -182,37 +230,54 @@ class DatabaseManager:
                 )
             """)
             
+            # Meta table (app state shared across sessions, e.g. last update time)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+            
             # Create indexes for better query performance
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_matches_date ON matches(date)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_matches_teams ON matches(home_team_id, away_team_id)")
+            # (team, date) lookups for form, H2H and league tables before a date
+            cursor.execute("DROP INDEX IF EXISTS idx_matches_teams")  # superseded by idx_matches_h2h
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_matches_h2h ON matches(home_team_id, away_team_id, date DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_matches_home_date ON matches(home_team_id, date DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_matches_away_date ON matches(away_team_id, date DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_matches_league_date ON matches(league_id, date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_matches_league_home ON matches(league_id, home_team_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_matches_league_away ON matches(league_id, away_team_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_teams_league ON teams(league_id, team_name)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_fixtures_date ON fixtures(date)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_team_stats_date ON team_stats(date)")
             
+            # Refresh planner statistics so the new indexes are picked up
+            cursor.execute("ANALYZE")
+            
             conn.commit()
             print("Database initialized successfully!")
     
     def insert_league(self, league_name: str, country: str, league_code: str, api_id: int = None) -> int:
         """Insert a league and return its ID"""
-        with self.connect() as conn:
+        with self._writing() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT OR IGNORE INTO leagues (league_name, country, league_code, api_id)
                 VALUES (?, ?, ?, ?)
             """, (league_name, country, league_code, api_id))
-            conn.commit()
             
             cursor.execute("SELECT league_id FROM leagues WHERE league_name = ?", (league_name,))
             return cursor.fetchone()[0]
     
     def insert_team(self, team_name: str, league_id: int, country: str = None) -> int:
         """Insert a team and return its ID"""
-        with self.connect() as conn:
+        with self._writing() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT OR IGNORE INTO teams (team_name, league_id, country)
                 VALUES (?, ?, ?)
             """, (team_name, league_id, country))
-            conn.commit()
             
             cursor.execute("""
                 SELECT team_id FROM teams WHERE team_name = ? AND league_id = ?
@@ -222,41 +287,156 @@ class DatabaseManager:
     
     def get_team_id(self, team_name: str, league_id: int) -> Optional[int]:
         """Get team ID by name and league"""
-        with self.connect() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT team_id FROM teams WHERE team_name = ? AND league_id = ?
-            """, (team_name, league_id))
-            result = cursor.fetchone()
-            return result[0] if result else None
+        result = self.connect().execute("""
+            SELECT team_id FROM teams WHERE team_name = ? AND league_id = ?
+        """, (team_name, league_id)).fetchone()
+        return result[0] if result else None
     
     def execute_query(self, query: str, params: tuple = None) -> List[tuple]:
-        """Execute a SELECT query and return results"""
-        with self.connect() as conn:
-            cursor = conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            return cursor.fetchall()
+        """Execute a SELECT query and return results (on the thread's persistent connection)"""
+        return self.connect().execute(query, params or ()).fetchall()
+    
+    def iter_query(self, query: str, params: tuple = None,
+                   chunk_size: int = 5000) -> Iterator[List[tuple]]:
+        """Execute a SELECT query and yield its rows in batches (fetchmany) instead of all at once"""
+        cursor = self.connect().cursor()
+        try:
+            cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
     
     def execute_update(self, query: str, params: tuple = None):
         """Execute an INSERT/UPDATE/DELETE query"""
-        with self.connect() as conn:
+        with self._writing() as conn:
             cursor = conn.cursor()
             if params:
                 cursor.execute(query, params)
             else:
                 cursor.execute(query)
+    
+    def get_meta(self, key: str) -> Optional[str]:
+        """Get a value from the meta table (None if unset or the table doesn't exist yet)"""
+        try:
+            result = self.execute_query("SELECT value FROM meta WHERE key = ?", (key,))
+        except sqlite3.OperationalError:
+            return None
+        return result[0][0] if result else None
+    
+    def set_meta(self, key: str, value: str):
+        """Store a value in the meta table (created on first use for older databases)"""
+        with self._writing() as conn:
+            cursor = conn.cursor()
+            cursor.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            cursor.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, value)
+            )
+    
+    def refresh_league_standings(self):
+        """
+        Rebuild the league_standings table (all-time table per league)
+        
+        Call after matches change so the app can read standings with an
+        index seek instead of aggregating every match.
+        """
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DROP TABLE IF EXISTS league_standings")
+            cursor.execute("""
+                CREATE TABLE league_standings AS
+                WITH team_matches AS (
+                    SELECT league_id,
+                           home_team_id AS team_id,
+                           CASE result WHEN 'H' THEN 3 WHEN 'D' THEN 1 ELSE 0 END AS pts,
+                           home_goals AS gf,
+                           away_goals AS ga
+                    FROM matches
+                    UNION ALL
+                    SELECT league_id,
+                           away_team_id,
+                           CASE result WHEN 'A' THEN 3 WHEN 'D' THEN 1 ELSE 0 END,
+                           away_goals,
+                           home_goals
+                    FROM matches
+                )
+                SELECT 
+                    tm.league_id,
+                    t.team_id,
+                    t.team_name,
+                    COUNT(*) as played,
+                    SUM(tm.pts) as points,
+                    SUM(tm.gf) as goals_for,
+                    SUM(tm.ga) as goals_against,
+                    SUM(tm.gf) - SUM(tm.ga) as GD
+                FROM team_matches tm
+                JOIN teams t ON t.team_id = tm.team_id
+                GROUP BY tm.league_id, t.team_id, t.team_name
+            """)
+            cursor.execute("""
+                CREATE INDEX idx_standings_league_pts 
+                ON league_standings(league_id, points DESC, GD DESC)
+            """)
+            # Match data just changed; keep the planner statistics current
+            cursor.execute("ANALYZE")
+            conn.commit()
+    
+    def refresh_team_recent_stats(self):
+        """
+        Rebuild the team_recent_stats table (rolling match stat totals per team)
+        
+        Each row holds a team's own totals over its last RECENT_STATS_MATCHES
+        matches up to and including as_of_date. Call after matches change, like
+        refresh_league_standings().
+        """
+        stats = ('yellow', 'red', 'fouls', 'shots', 'shots_on_target', 'corners', 'goals')
+        home_columns = ", ".join(f"COALESCE(home_{stat}, 0) AS {stat}" for stat in stats)
+        away_columns = ", ".join(f"COALESCE(away_{stat}, 0)" for stat in stats)
+        window_totals = ", ".join(f"SUM({stat}) OVER recent AS {stat}" for stat in stats)
+        
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DROP TABLE IF EXISTS team_recent_stats")
+            cursor.execute(f"""
+                CREATE TABLE team_recent_stats AS
+                WITH team_matches AS (
+                    SELECT home_team_id AS team_id, date, {home_columns}
+                    FROM matches
+                    UNION ALL
+                    SELECT away_team_id, date, {away_columns}
+                    FROM matches
+                )
+                SELECT 
+                    team_id,
+                    date AS as_of_date,
+                    COUNT(*) OVER recent AS matches_played,
+                    {window_totals}
+                FROM team_matches
+                WINDOW recent AS (
+                    PARTITION BY team_id ORDER BY date
+                    ROWS BETWEEN {RECENT_STATS_MATCHES - 1} PRECEDING AND CURRENT ROW
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX idx_recent_stats_team_date 
+                ON team_recent_stats(team_id, as_of_date DESC)
+            """)
+            cursor.execute("ANALYZE team_recent_stats")
             conn.commit()
     
-    def get_dataframe(self, query: str, params: tuple = None) -> pd.DataFrame:
-        """Execute query and return as pandas DataFrame"""
+    def get_dataframe(self, query: str, params: tuple = None,
+                      dtype_backend: str = None) -> pd.DataFrame:
+        """Execute query and return as pandas DataFrame (Arrow-backed if dtype_backend='pyarrow')"""
+        kwargs = {'dtype_backend': dtype_backend} if dtype_backend else {}
         with self.connect() as conn:
             if params:
-                return pd.read_sql_query(query, conn, params=params)
+                return pd.read_sql_query(query, conn, params=params, **kwargs)
             else:
-                return pd.read_sql_query(query, conn)
+                return pd.read_sql_query(query, conn, **kwargs)
 
 # Initialize database on import
 if __name__ == "__main__":
@@ -265,11 +445,12 @@ if __name__ == "__main__":
     
     # Insert leagues
     from config.config import LEAGUES
-    for league_key, league_info in LEAGUES.items():
-        league_id = db.insert_league(
-            league_info['name'],
-            league_info['country'],
-            league_info['code'],
-            league_info.get('api_id')
-        )
-        print(f"Inserted/verified {league_info['name']} (ID: {league_id})")
+    with db.transaction():
+        for league_key, league_info in LEAGUES.items():
+            league_id = db.insert_league(
+                league_info['name'],
+                league_info['country'],
+                league_info['code'],
+                league_info.get('api_id')
+            )
+            print(f"Inserted/verified {league_info['name']} (ID: {league_id})")
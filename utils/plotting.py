@@ -0,0 +1,61 @@
+"""
+Plotting helpers
+Keeps large series small enough for the browser to render smoothly
+"""
+import numpy as np
+import pandas as pd
+
+def downsample(df: pd.DataFrame, x_col: str, y_col: str, n_out: int = 2000) -> pd.DataFrame:
+    """
+    Down-sample a series with Largest-Triangle-Three-Buckets (LTTB)
+    
+    Keeps the first and last points, and from each bucket in between the
+    point forming the largest triangle with its neighbours, so peaks and
+    dips survive the reduction.
+    
+    Args:
+        df: DataFrame sorted by x_col
+        x_col: Column for the x axis (numeric, datetime or categorical)
+        y_col: Numeric column for the y axis
+        n_out: Maximum number of points to keep
+    
+    Returns:
+        DataFrame with at most n_out rows (df itself if already small enough)
+    """
+    n = len(df)
+    if n <= n_out or n_out < 3:
+        return df
+    
+    x = df[x_col]
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = x.astype('int64').to_numpy(dtype=float)
+    elif pd.api.types.is_numeric_dtype(x):
+        x = x.to_numpy(dtype=float)
+    else:
+        x = np.arange(n, dtype=float)
+    y = df[y_col].to_numpy(dtype=float)
+    
+    bucket_size = (n - 2) / (n_out - 2)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    
+    for i in range(n_out - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        
+        # Average of the next bucket is the third triangle vertex
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    
+    selected[-1] = n - 1
+    
+    return df.iloc[selected]
@@ -7,6 +7,32 @@ import pandas as pd
 from pathlib import Path
 from typing import Dict, List, Optional
 
+# One row per team per match (home and away sides), ranked newest first per team
+_TEAM_MATCHES_CTE = """
+WITH team_matches AS (
+    SELECT m.match_id, m.date, m.home_team_id AS team_id, 1 AS is_home,
+           m.home_goals AS gf, m.away_goals AS ga,
+           CASE m.result WHEN 'H' THEN 'W' WHEN 'D' THEN 'D' ELSE 'L' END AS outcome
+    FROM matches m
+    JOIN leagues l ON m.league_id = l.league_id
+    WHERE l.league_name = ? AND m.season = ?
+    UNION ALL
+    SELECT m.match_id, m.date, m.away_team_id, 0,
+           m.away_goals, m.home_goals,
+           CASE m.result WHEN 'A' THEN 'W' WHEN 'D' THEN 'D' ELSE 'L' END
+    FROM matches m
+    JOIN leagues l ON m.league_id = l.league_id
+    WHERE l.league_name = ? AND m.season = ?
+),
+ranked AS (
+    SELECT tm.*,
+           ROW_NUMBER() OVER (
+               PARTITION BY tm.team_id ORDER BY tm.date DESC, tm.match_id DESC
+           ) AS rn
+    FROM team_matches tm
+)
+"""
+
 class StandingsCalculator:
     """Calculate live league standings from database"""
     
@@ -92,91 +118,36 @@ class StandingsCalculator:
         
         conn = sqlite3.connect(self.db_path)
         
-        query = """
-        SELECT DISTINCT
-            m.match_id,
-            ht.team_name as home_team,
-            at.team_name as away_team,
-            m.home_goals,
-            m.away_goals,
-            m.result
-        FROM matches m
-        JOIN teams ht ON m.home_team_id = ht.team_id
-        JOIN teams at ON m.away_team_id = at.team_id
-        JOIN leagues l ON m.league_id = l.league_id
-        WHERE l.league_name = ? AND m.season = ?
+        # Totals per team plus form string (last 5 matches, most recent first)
+        query = _TEAM_MATCHES_CTE + """
+        SELECT
+            t.team_name as Team,
+            COUNT(*) as Played,
+            SUM(r.outcome = 'W') as Won,
+            SUM(r.outcome = 'D') as Drawn,
+            SUM(r.outcome = 'L') as Lost,
+            SUM(r.gf) as GF,
+            SUM(r.ga) as GA,
+            SUM(r.gf) - SUM(r.ga) as GD,
+            3 * SUM(r.outcome = 'W') + SUM(r.outcome = 'D') as Points,
+            (SELECT GROUP_CONCAT(f.outcome, '')
+             FROM (SELECT outcome FROM ranked
+                   WHERE team_id = r.team_id AND rn <= 5
+                   ORDER BY rn) f) as Form
+        FROM ranked r
+        JOIN teams t ON r.team_id = t.team_id
+        GROUP BY r.team_id
+        ORDER BY Points DESC, GD DESC, GF DESC
         """
         
-        df = pd.read_sql_query(query, conn, params=(league_name, season))
+        standings_df = pd.read_sql_query(
+            query, conn, params=(league_name, season, league_name, season)
+        )
         conn.close()
         
-        if df.empty:
+        if standings_df.empty:
             return pd.DataFrame()
         
-        teams = set(df['home_team'].unique()) | set(df['away_team'].unique())
-        standings = []
-        
-        for team in teams:
-            home_matches = df[df['home_team'] == team]
-            away_matches = df[df['away_team'] == team]
-            
-            played = len(home_matches) + len(away_matches)
-            
-            # Home stats
-            home_wins = len(home_matches[home_matches['result'] == 'H'])
-            home_draws = len(home_matches[home_matches['result'] == 'D'])
-            home_losses = len(home_matches[home_matches['result'] == 'A'])
-            home_gf = int(home_matches['home_goals'].sum())
-            home_ga = int(home_matches['away_goals'].sum())
-            
-            # Away stats
-            away_wins = len(away_matches[away_matches['result'] == 'A'])
-            away_draws = len(away_matches[away_matches['result'] == 'D'])
-            away_losses = len(away_matches[away_matches['result'] == 'H'])
-            away_gf = int(away_matches['away_goals'].sum())
-            away_ga = int(away_matches['home_goals'].sum())
-            
-            # Total stats
-            wins = home_wins + away_wins
-            draws = home_draws + away_draws
-            losses = home_losses + away_losses
-            gf = home_gf + away_gf
-            ga = home_ga + away_ga
-            gd = gf - ga
-            points = wins * 3 + draws
-            
-            # Form (last 5 matches)
-            team_matches = pd.concat([
-                home_matches.assign(is_home=True),
-                away_matches.assign(is_home=False)
-            ]).sort_index(ascending=False).head(5)
-            
-            form = []
-            for _, match in team_matches.iterrows():
-                if match['is_home']:
-                    form.append('W' if match['result'] == 'H' else 'D' if match['result'] == 'D' else 'L')
-                else:
-                    form.append('W' if match['result'] == 'A' else 'D' if match['result'] == 'D' else 'L')
-            
-            standings.append({
-                'Team': team,
-                'Played': played,
-                'Won': wins,
-                'Drawn': draws,
-                'Lost': losses,
-                'GF': gf,
-                'GA': ga,
-                'GD': gd,
-                'Points': points,
-                'Form': ''.join(form)
-            })
-        
-        standings_df = pd.DataFrame(standings)
-        standings_df = standings_df.sort_values(
-            by=['Points', 'GD', 'GF'], 
-            ascending=[False, False, False]
-        ).reset_index(drop=True)
-        
         standings_df.insert(0, 'Rank', range(1, len(standings_df) + 1))
         
         return standings_df
@@ -188,59 +159,31 @@ class StandingsCalculator:
         
         conn = sqlite3.connect(self.db_path)
         
-        query = """
-        SELECT DISTINCT
-            m.match_id,
-            ht.team_name as team,
-            m.home_goals as gf,
-            m.away_goals as ga,
-            m.result
-        FROM matches m
-        JOIN teams ht ON m.home_team_id = ht.team_id
-        JOIN leagues l ON m.league_id = l.league_id
-        WHERE l.league_name = ? AND m.season = ?
+        query = _TEAM_MATCHES_CTE + """
+        SELECT
+            t.team_name as Team,
+            COUNT(*) as Played,
+            SUM(r.outcome = 'W') as Home_W,
+            SUM(r.outcome = 'D') as Home_D,
+            SUM(r.outcome = 'L') as Home_L,
+            SUM(r.gf) as GF,
+            SUM(r.ga) as GA,
+            SUM(r.gf) - SUM(r.ga) as GD,
+            3 * SUM(r.outcome = 'W') + SUM(r.outcome = 'D') as Points
+        FROM ranked r
+        JOIN teams t ON r.team_id = t.team_id
+        WHERE r.is_home = 1
+        GROUP BY r.team_id
+        ORDER BY Points DESC, GD DESC, GF DESC
         """
         
-        df = pd.read_sql_query(query, conn, params=(league_name, season))
+        standings_df = pd.read_sql_query(
+            query, conn, params=(league_name, season, league_name, season)
+        )
         conn.close()
         
-        if df.empty:
-            return pd.DataFrame()
-        
-        teams = df['team'].unique()
-        standings = []
-        
-        for team in teams:
-            team_matches = df[df['team'] == team]
-            played = len(team_matches)
-            wins = len(team_matches[team_matches['result'] == 'H'])
-            draws = len(team_matches[team_matches['result'] == 'D'])
-            losses = len(team_matches[team_matches['result'] == 'A'])
-            gf = int(team_matches['gf'].sum())
-            ga = int(team_matches['ga'].sum())
-            gd = gf - ga
-            points = wins * 3 + draws
-            
-            standings.append({
-                'Team': team,
-                'Played': played,
-                'Home_W': wins,      # Changed from 'Won'
-                'Home_D': draws,     # Changed from 'Drawn'
-                'Home_L': losses,    # Changed from 'Lost'
-                'GF': gf,
-                'GA': ga,
-                'GD': gd,
-                'Points': points
-            })
-        
-        standings_df = pd.DataFrame(standings)
         if standings_df.empty:
-            return standings_df
-            
-        standings_df = standings_df.sort_values(
-            by=['Points', 'GD', 'GF'],
-            ascending=[False, False, False]
-        ).reset_index(drop=True)
+            return pd.DataFrame()
         
         standings_df.insert(0, 'Rank', range(1, len(standings_df) + 1))
         
@@ -253,59 +196,31 @@ class StandingsCalculator:
         
         conn = sqlite3.connect(self.db_path)
         
-        query = """
-        SELECT DISTINCT
-            m.match_id,
-            at.team_name as team,
-            m.away_goals as gf,
-            m.home_goals as ga,
-            m.result
-        FROM matches m
-        JOIN teams at ON m.away_team_id = at.team_id
-        JOIN leagues l ON m.league_id = l.league_id
-        WHERE l.league_name = ? AND m.season = ?
+        query = _TEAM_MATCHES_CTE + """
+        SELECT
+            t.team_name as Team,
+            COUNT(*) as Played,
+            SUM(r.outcome = 'W') as Away_W,
+            SUM(r.outcome = 'D') as Away_D,
+            SUM(r.outcome = 'L') as Away_L,
+            SUM(r.gf) as GF,
+            SUM(r.ga) as GA,
+            SUM(r.gf) - SUM(r.ga) as GD,
+            3 * SUM(r.outcome = 'W') + SUM(r.outcome = 'D') as Points
+        FROM ranked r
+        JOIN teams t ON r.team_id = t.team_id
+        WHERE r.is_home = 0
+        GROUP BY r.team_id
+        ORDER BY Points DESC, GD DESC, GF DESC
         """
         
-        df = pd.read_sql_query(query, conn, params=(league_name, season))
+        standings_df = pd.read_sql_query(
+            query, conn, params=(league_name, season, league_name, season)
+        )
         conn.close()
         
-        if df.empty:
-            return pd.DataFrame()
-        
-        teams = df['team'].unique()
-        standings = []
-        
-        for team in teams:
-            team_matches = df[df['team'] == team]
-            played = len(team_matches)
-            wins = len(team_matches[team_matches['result'] == 'A'])
-            draws = len(team_matches[team_matches['result'] == 'D'])
-            losses = len(team_matches[team_matches['result'] == 'H'])
-            gf = int(team_matches['gf'].sum())
-            ga = int(team_matches['ga'].sum())
-            gd = gf - ga
-            points = wins * 3 + draws
-            
-            standings.append({
-                'Team': team,
-                'Played': played,
-                'Away_W': wins,      # Changed from 'Won'
-                'Away_D': draws,     # Changed from 'Drawn'
-                'Away_L': losses,    # Changed from 'Lost'
-                'GF': gf,
-                'GA': ga,
-                'GD': gd,
-                'Points': points
-            })
-        
-        standings_df = pd.DataFrame(standings)
         if standings_df.empty:
-            return standings_df
-            
-        standings_df = standings_df.sort_values(
-            by=['Points', 'GD', 'GF'],
-            ascending=[False, False, False]
-        ).reset_index(drop=True)
+            return pd.DataFrame()
         
         standings_df.insert(0, 'Rank', range(1, len(standings_df) + 1))
         
@@ -318,88 +233,32 @@ class StandingsCalculator:
         
         conn = sqlite3.connect(self.db_path)
         
-        query = """
-        SELECT DISTINCT
-            m.match_id,
-            ht.team_name as home_team,
-            at.team_name as away_team,
-            m.home_goals,
-            m.away_goals,
-            m.result
-        FROM matches m
-        JOIN teams ht ON m.home_team_id = ht.team_id
-        JOIN teams at ON m.away_team_id = at.team_id
-        JOIN leagues l ON m.league_id = l.league_id
-        WHERE l.league_name = ? AND m.season = ?
+        query = _TEAM_MATCHES_CTE + """
+        SELECT
+            t.team_name as Team,
+            COUNT(*) as Played,
+            SUM(r.outcome = 'W') as Won,
+            SUM(r.outcome = 'D') as Drawn,
+            SUM(r.outcome = 'L') as Lost,
+            SUM(r.gf) as GF,
+            SUM(r.ga) as GA,
+            SUM(r.gf) - SUM(r.ga) as GD,
+            3 * SUM(r.outcome = 'W') + SUM(r.outcome = 'D') as Points
+        FROM ranked r
+        JOIN teams t ON r.team_id = t.team_id
+        WHERE r.rn <= ?
+        GROUP BY r.team_id
+        ORDER BY Points DESC, GD DESC, GF DESC
         """
         
-        df = pd.read_sql_query(query, conn, params=(league_name, season))
+        form_df = pd.read_sql_query(
+            query, conn, params=(league_name, season, league_name, season, num_matches)
+        )
         conn.close()
         
-        if df.empty:
+        if form_df.empty:
             return pd.DataFrame()
         
-        teams = set(df['home_team'].unique()) | set(df['away_team'].unique())
-        form_standings = []
-        
-        for team in teams:
-            team_matches = pd.concat([
-                df[df['home_team'] == team].assign(is_home=True),
-                df[df['away_team'] == team].assign(is_home=False)
-            ]).sort_index(ascending=False).head(num_matches)
-            
-            if len(team_matches) == 0:
-                continue
-            
-            points = 0
-            wins = 0
-            draws = 0
-            losses = 0
-            gf = 0
-            ga = 0
-            
-            for _, match in team_matches.iterrows():
-                if match['is_home']:
-                    gf += match['home_goals']
-                    ga += match['away_goals']
-                    if match['result'] == 'H':
-                        wins += 1
-                        points += 3
-                    elif match['result'] == 'D':
-                        draws += 1
-                        points += 1
-                    else:
-                        losses += 1
-                else:
-                    gf += match['away_goals']
-                    ga += match['home_goals']
-                    if match['result'] == 'A':
-                        wins += 1
-                        points += 3
-                    elif match['result'] == 'D':
-                        draws += 1
-                        points += 1
-                    else:
-                        losses += 1
-            
-            form_standings.append({
-                'Team': team,
-                'Played': len(team_matches),
-                'Won': wins,
-                'Drawn': draws,
-                'Lost': losses,
-                'GF': int(gf),
-                'GA': int(ga),
-                'GD': int(gf - ga),
-                'Points': points
-            })
-        
-        form_df = pd.DataFrame(form_standings)
-        form_df = form_df.sort_values(
-            by=['Points', 'GD', 'GF'],
-            ascending=[False, False, False]
-        ).reset_index(drop=True)
-        
         form_df.insert(0, 'Rank', range(1, len(form_df) + 1))
         
-        return form_df
\ No newline at end of file
+        return form_df